@@ -537,6 +537,255 @@ except ValueError as e:
 
 print()
 
+# Fast timestamp parsing example
+print("Fast timestamp parsing:")
+
+import time
+from datetime import date, datetime, timezone
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def timestamp_to_epoch(text, date_cache=None):
+    """Convert 'YYYY-MM-DD HH:MM:SS' (or just 'YYYY-MM-DD') at the start
+    of text into seconds since 1970-01-01 UTC.
+    
+    Reads the digits at fixed positions instead of using strptime.
+    date_cache is a list [date_text, seconds]; passing the same list for
+    consecutive lines skips the date calculation when the day is the same.
+    """
+    if date_cache is None:
+        date_cache = [None, 0]
+    
+    day = text[:10]
+    if day != date_cache[0]:
+        if len(day) != 10 or day[4] != '-' or day[7] != '-' or not (day[:4] + day[5:7] + day[8:10]).isdigit():
+            raise ValueError(f"Not a YYYY-MM-DD timestamp: {text[:19]!r}")
+        days = date(int(day[:4]), int(day[5:7]), int(day[8:10])).toordinal() - EPOCH_ORDINAL
+        date_cache[0] = day
+        date_cache[1] = days * 86400
+    
+    # Date only ('2025-09-24' or '2025-09-24 ERROR ...'): midnight
+    if len(text) == 10 or (text[10] == ' ' and not text[11:12].isdigit()):
+        return date_cache[1]
+    
+    # Anything else must be ' HH:MM:SS'; '9:15:23' or '09:15' is an error
+    clock = text[10:19]
+    if (len(clock) != 9 or clock[0] != ' ' or clock[3] != ':' or clock[6] != ':'
+            or not (clock[1:3] + clock[4:6] + clock[7:9]).isdigit()):
+        raise ValueError(f"Not a HH:MM:SS time: {text[10:19].strip()!r}")
+    
+    hours, minutes, seconds = int(clock[1:3]), int(clock[4:6]), int(clock[7:9])
+    if hours > 23 or minutes > 59 or seconds > 59:
+        raise ValueError(f"Invalid time: {text[11:19]!r}")
+    return date_cache[1] + hours * 3600 + minutes * 60 + seconds
+
+def timestamps_to_epochs(lines):
+    """Convert the timestamps of a whole list of log lines at once.
+    
+    Returns a list of epochs with None for lines without a valid timestamp.
+    """
+    date_cache = [None, 0]  # Shared by all lines of the batch
+    epochs = []
+    for line in lines:
+        try:
+            epochs.append(timestamp_to_epoch(line, date_cache))
+        except ValueError:
+            epochs.append(None)
+    return epochs
+
+sample_lines = [
+    "2025-10-04 09:15:23 INFO User alice logged in successfully",
+    "2025-10-04 09:16:45 WARNING Failed login attempt for user bob",
+    "2025-09-24 ERROR firewall Connection blocked from suspicious IP",
+    "not a log line",
+]
+for line, epoch in zip(sample_lines, timestamps_to_epochs(sample_lines)):
+    print(f"  {str(epoch):>10} <- {line}")
+
+# Compare with strptime on 100,000 lines
+benchmark_lines = [f"2025-10-04 {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d} INFO x"
+                   for i in range(100_000)]
+
+start = time.perf_counter()
+slow_epochs = [int(datetime.strptime(line[:19], "%Y-%m-%d %H:%M:%S")
+                   .replace(tzinfo=timezone.utc).timestamp()) for line in benchmark_lines]
+strptime_seconds = time.perf_counter() - start
+
+start = time.perf_counter()
+fast_epochs = timestamps_to_epochs(benchmark_lines)
+fast_seconds = time.perf_counter() - start
+
+print(f"  strptime:             {strptime_seconds:.3f} s for 100,000 lines")
+print(f"  timestamps_to_epochs: {fast_seconds:.3f} s for 100,000 lines")
+print(f"  Same results: {slow_epochs == fast_epochs}")
+
+print()
+
+# Batch log analysis example
+print("Analyzing many log entries at once:")
+
+import sys
+from array import array
+
+# Small integer codes instead of strings; the names are looked up by code
+SEVERITY_NAMES = ['UNKNOWN', 'LOW', 'MEDIUM', 'HIGH']
+SEVERITY_CODES = {name: code for code, name in enumerate(SEVERITY_NAMES)}
+
+# Code 0 of each name table stands for every name that did not fit
+OTHER_NAME = '<other>'
+
+def analyze_log_entries(lines, level_names=None, source_names=None, max_names=10_000):
+    """Analyze a whole batch of log lines like analyze_log_entry, but
+    return one array per field instead of one tuple per line.
+    
+    Returns a dictionary with the arrays 'timestamps' (seconds since
+    1970, -1 if missing), 'level_codes', 'source_ids', 'message_offsets'
+    (where the message starts in the line, -1 if invalid) and
+    'severity_codes', plus the 'level_names' and 'source_names' lists
+    that the codes point into. Pass the name lists of an earlier batch
+    to keep the same codes across batches.
+    
+    Each name list holds at most max_names entries; once it is full,
+    new names get code 0 (OTHER_NAME) and log_entry_from_batch reads
+    them back from the line itself.
+    """
+    if max_names < 2:
+        raise ValueError("max_names must be at least 2")
+    if not hasattr(lines, '__len__'):
+        lines = list(lines)
+    count = len(lines)
+    
+    level_names = level_names if level_names is not None else [OTHER_NAME, 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
+    source_names = source_names if source_names is not None else [OTHER_NAME]
+    level_ids = {name: code for code, name in enumerate(level_names)}
+    source_ids = {name: code for code, name in enumerate(source_names)}
+    
+    # Arrays of the right size are created once and then filled in
+    batch = {
+        'timestamps': array('q', [-1]) * count,
+        'level_codes': array('H', [0]) * count,
+        'source_ids': array('I', [0]) * count,
+        'message_offsets': array('i', [-1]) * count,
+        'severity_codes': array('B', [SEVERITY_CODES['UNKNOWN']]) * count,
+        'level_names': level_names,
+        'source_names': source_names,
+    }
+    timestamps = batch['timestamps']
+    level_codes = batch['level_codes']
+    source_codes = batch['source_ids']
+    message_offsets = batch['message_offsets']
+    severity_codes = batch['severity_codes']
+    date_cache = [None, 0]
+    epochs = {}
+    high, medium, low = SEVERITY_CODES['HIGH'], SEVERITY_CODES['MEDIUM'], SEVERITY_CODES['LOW']
+    
+    for i, line in enumerate(lines):
+        # split(" ", 3) gives the same fields as analyze_log_entry's
+        # split(" ") followed by " ".join(parts[3:])
+        parts = line.split(" ", 3)
+        if len(parts) < 4:
+            continue
+        timestamp, level, source, _ = parts
+        
+        # Many lines share a timestamp, so remember the converted ones
+        epoch = epochs.get(timestamp)
+        if epoch is None:
+            try:
+                epoch = timestamp_to_epoch(timestamp, date_cache)
+            except ValueError:
+                epoch = -1
+            if len(epochs) > 100_000:
+                epochs.clear()
+            epochs[timestamp] = epoch
+        timestamps[i] = epoch
+        
+        # Malformed logs can have a new "level" on every line (e.g. the
+        # time of "YYYY-MM-DD HH:MM:SS INFO ..."), so the tables are capped
+        level_code = level_ids.get(level)
+        if level_code is None:
+            level_code = 0
+            if len(level_names) < max_names:
+                level_code = level_ids[level] = len(level_names)
+                level_names.append(level)
+        level_codes[i] = level_code
+        
+        source_code = source_ids.get(source)
+        if source_code is None:
+            source_code = 0
+            if len(source_names) < max_names:
+                source_code = source_ids[source] = len(source_names)
+                source_names.append(source)
+        source_codes[i] = source_code
+        
+        message_offsets[i] = len(timestamp) + len(level) + len(source) + 3
+        if level in ("ERROR", "CRITICAL"):
+            severity_codes[i] = high
+        elif level == "WARNING":
+            severity_codes[i] = medium
+        else:
+            severity_codes[i] = low
+    
+    return batch
+
+def log_entry_from_batch(batch, index, log_line):
+    """Rebuild the tuple analyze_log_entry returns for one line of a batch"""
+    offset = batch['message_offsets'][index]
+    if offset < 0:
+        return None, None, None, "Invalid log format", "UNKNOWN"
+    timestamp, level, source, _ = log_line.split(" ", 3)
+    level_code = batch['level_codes'][index]
+    source_code = batch['source_ids'][index]
+    return (timestamp,
+            batch['level_names'][level_code] if level_code else level,
+            batch['source_names'][source_code] if source_code else source,
+            log_line[offset:],
+            SEVERITY_NAMES[batch['severity_codes'][index]])
+
+batch_lines = [
+    "2025-09-24 ERROR firewall Connection blocked from suspicious IP",
+    "2025-09-24 INFO vpn User alice connected",
+    "2025-09-25 WARNING firewall Port scan detected",
+    "corrupted entry",
+]
+batch = analyze_log_entries(batch_lines)
+print(f"  level_codes:    {batch['level_codes'].tolist()}")
+print(f"  source_ids:     {batch['source_ids'].tolist()} -> {batch['source_names']}")
+print(f"  severity_codes: {batch['severity_codes'].tolist()} -> {SEVERITY_NAMES}")
+print(f"  Same as analyze_log_entry: "
+      f"{all(log_entry_from_batch(batch, i, line) == analyze_log_entry(line) for i, line in enumerate(batch_lines))}")
+
+# With a clock in the line, every second looks like a new level name
+clock_lines = [f"2025-10-04 {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d} INFO login" for i in range(70_000)]
+clock_batch = analyze_log_entries(clock_lines)
+print(f"  {len(clock_lines):,} lines with a clock: {len(clock_batch['level_names']):,} level names kept, "
+      f"same as analyze_log_entry: "
+      f"{all(log_entry_from_batch(clock_batch, i, line) == analyze_log_entry(line) for i, line in enumerate(clock_lines))}")
+
+# Aggregating 100,000 entries: tuples vs arrays
+sources = ["firewall", "vpn", "web", "mail"]
+levels = ["INFO", "INFO", "WARNING", "ERROR", "CRITICAL"]
+many_lines = [f"2025-09-{24 + i % 5} {levels[i % 5]} {sources[i % 4]} Event number {i}"
+              for i in range(100_000)]
+
+start = time.perf_counter()
+entries = [analyze_log_entry(line) for line in many_lines]
+high_from_tuples = sum(1 for entry in entries if entry[4] == "HIGH")
+tuple_seconds = time.perf_counter() - start
+
+start = time.perf_counter()
+many = analyze_log_entries(many_lines)
+high_from_arrays = many['severity_codes'].count(SEVERITY_CODES['HIGH'])
+array_seconds = time.perf_counter() - start
+
+tuple_bytes = sum(sys.getsizeof(entry) + sum(sys.getsizeof(value) for value in entry) for entry in entries)
+array_bytes = sum(value.itemsize * len(value) for value in many.values() if isinstance(value, array))
+
+print(f"  100,000 tuples: {tuple_seconds:.3f} s, about {tuple_bytes / 1_000_000:.1f} MB")
+print(f"  arrays:         {array_seconds:.3f} s, {array_bytes / 1_000_000:.1f} MB")
+print(f"  HIGH severity entries: {high_from_tuples} and {high_from_arrays}")
+
+print()
+
 # -----------------------------------------------------------------------------
 # 10. EXERCISES FOR PRACTICE
 # -----------------------------------------------------------------------------
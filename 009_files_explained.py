@@ -11,6 +11,7 @@ Learning objectives:
 - Implement file-based data persistence
 - Handle file errors and exceptions gracefully
 - Apply file operations to real-world scenarios
+- Scale log processing to very large files
 
 Author: Programming Instructor
 Date: 04-Oct-2025
@@ -131,6 +132,33 @@ print("-" * 26)
 
 print("Example: Analyzing security log data")
 
+# Level keywords in the order they are checked: a line counts once
+SECURITY_LEVELS = ['INFO', 'WARNING', 'ERROR', 'CRITICAL']
+
+def parse_security_line(line):
+    """Return (level, users, ip) for one stripped log line.
+    
+    level is 'INFO', 'WARNING', 'ERROR', 'CRITICAL' or None, users is a
+    list of the names after the word "user", ip is the text after 'IP:'
+    (or None). Every security log analyzer in this file uses these rules.
+    """
+    
+    level = None
+    for keyword in SECURITY_LEVELS:
+        if keyword in line:
+            level = keyword
+            break
+    
+    users = []
+    if 'user ' in line.lower():
+        words = line.split()
+        for i, word in enumerate(words):
+            if word.lower() == 'user' and i + 1 < len(words):
+                users.append(words[i + 1])
+    
+    ip = line.split('IP:')[1].strip() if 'IP:' in line else None
+    return level, users, ip
+
 def analyze_security_log(filename):
     """Analyze security log file and return statistics"""
     
@@ -152,31 +180,18 @@ def analyze_security_log(filename):
                     continue
                 
                 log_stats['total_entries'] += 1
+                level, users, ip = parse_security_line(line)
                 
                 # Count log levels
-                if 'INFO' in line:
-                    log_stats['info_count'] += 1
-                elif 'WARNING' in line:
-                    log_stats['warning_count'] += 1
-                elif 'ERROR' in line:
-                    log_stats['error_count'] += 1
-                elif 'CRITICAL' in line:
-                    log_stats['critical_count'] += 1
+                if level:
+                    log_stats[level.lower() + '_count'] += 1
                 
                 # Extract usernames
-                if 'user ' in line.lower():
-                    words = line.split()
-                    for i, word in enumerate(words):
-                        if word.lower() == 'user' and i + 1 < len(words):
-                            username = words[i + 1]
-                            log_stats['users'].add(username)
+                log_stats['users'].update(users)
                 
                 # Extract suspicious IPs
-                if 'IP:' in line:
-                    parts = line.split('IP:')
-                    if len(parts) > 1:
-                        ip = parts[1].strip()
-                        log_stats['suspicious_ips'].append(ip)
+                if ip is not None:
+                    log_stats['suspicious_ips'].append(ip)
     
     except FileNotFoundError:
         print(f"Error: File '{filename}' not found")
@@ -628,7 +643,7 @@ def process_large_log_file(filename):
     }
 
 # Pattern 2: Batch processing with progress tracking
-def process_file_batch(filenames):
+def process_file_batch(filenames, process_function=process_large_log_file):
     """Process multiple files with progress tracking"""
     
     results = []
@@ -637,7 +652,7 @@ def process_file_batch(filenames):
     for i, filename in enumerate(filenames, 1):
         print(f"Processing file {i}/{total_files}: {filename}")
         
-        result = process_large_log_file(filename)
+        result = process_function(filename)
         if result:
             result['filename'] = filename
             results.append(result)
@@ -707,10 +722,2755 @@ safe_file_update(test_file, new_content)
 print()
 
 # -----------------------------------------------------------------------------
-# 10. EXERCISES FOR PRACTICE
+# 10. WORKING WITH VERY LARGE LOG FILES
+# -----------------------------------------------------------------------------
+
+print("10. Working with Very Large Log Files")
+print("-" * 37)
+
+import mmap
+import os
+import random
+import re
+import time
+
+print("Real security logs can be tens of gigabytes per night.")
+print("At that size the per-line Python work (decode, strip, split)")
+print("costs more than reading the data from disk.")
+print()
+
+def create_large_log_file(filename, num_lines, seed=42):
+    """Write a synthetic security log with num_lines random entries"""
+    
+    rng = random.Random(seed)  # Same seed -> same file every time
+    users = ['alice', 'bob', 'charlie', 'dave', 'eve', 'mallory']
+    templates = [
+        ('INFO', 'User {user} logged in successfully'),
+        ('INFO', 'User {user} accessed secure document'),
+        ('WARNING', 'Failed login attempt for user {user}'),
+        ('WARNING', 'Multiple failed attempts detected'),
+        ('ERROR', 'Database connection timeout'),
+        ('CRITICAL', 'Security breach detected - IP: {ip}'),
+    ]
+    
+    with open(filename, 'w') as f:
+        for i in range(num_lines):
+            level, message = rng.choice(templates)
+            message = message.format(
+                user=rng.choice(users),
+                ip=f"192.168.{rng.randint(0, 3)}.{rng.randint(1, 254)}"
+            )
+            minute, second = divmod(i % 3600, 60)
+            f.write(f"2025-10-04 10:{minute:02d}:{second:02d} {level} {message}\n")
+    
+    return Path(filename)
+
+def time_function(function, *args, **kwargs):
+    """Run a function once and return (result, seconds taken)"""
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+large_log_path = create_large_log_file(current_dir / 'large_security_log.txt', 200_000)
+print(f"Created {large_log_path.name}: {large_log_path.stat().st_size / 1_000_000:.1f} MB")
+print()
+
+# Technique 1: Memory-mapped scanning on raw bytes
+print("Technique 1: Memory-mapped scanning with mmap")
+print()
+
+# Byte patterns are compiled once. They run inside the regex engine,
+# so there is no Python-level loop over the lines of the file.
+LOG_LEVELS = [
+    (b'INFO', 'info_count'),
+    (b'WARNING', 'warning_count'),
+    (b'ERROR', 'error_count'),
+    (b'CRITICAL', 'critical_count'),
+]
+BLANK_LINE = re.compile(rb'\n(?=[ \t\r\f\v]*(?:\n|\Z))')
+BLANK_FIRST_LINE = re.compile(rb'[ \t\r\f\v]*(?:\n|\Z)')
+# translate() tables: keep only upper-case letters / only markers and newlines
+NOT_UPPERCASE = bytes(b for b in range(256) if not (65 <= b <= 90 or b == 10))
+NOT_MARKER = bytes(b for b in range(256) if b not in (0, 10))
+# "user <name>" / "User <name>" where user is a whole word
+USER_FIELD = re.compile(rb'ser(?<=[Uu]ser)(?<![^\s][Uu]ser)(?=([ \t\r\f\v])[ \t\r\f\v]*([^\s]+))')
+IP_FIELD = re.compile(rb'IP:([^\n]*)')
+
+def has_two_keywords_on_a_line(chunk, keywords):
+    """Return True if any line of chunk holds two of the upper-case keywords"""
+    
+    # Mark every keyword with a zero byte, then drop everything but
+    # markers and newlines: two markers in a row = two keywords on one
+    # line. Dropping lower-case text first keeps the replace() calls cheap.
+    marked = chunk.translate(None, NOT_UPPERCASE)
+    for keyword in keywords:
+        marked = marked.replace(keyword, b'\x00')
+    return b'\x00\x00' in marked.translate(None, NOT_MARKER)
+
+def scan_log_lines(chunk, log_stats, users):
+    """Count levels and collect users line by line (exact fallback)"""
+    for line in chunk.decode().split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        
+        level, line_users, _ = parse_security_line(line)
+        if level:
+            log_stats[level.lower() + '_count'] += 1
+        users.update(user.encode() for user in line_users)
+
+def scan_log_chunk(chunk, log_stats, users):
+    """Update log_stats from a chunk of raw bytes that ends on a newline"""
+    
+    # Non-empty lines = all lines - whitespace-only lines
+    lines = chunk.count(b'\n') + (0 if chunk.endswith(b'\n') else 1)
+    blank = sum(1 for _ in BLANK_LINE.finditer(chunk))
+    if BLANK_FIRST_LINE.match(chunk):
+        blank += 1
+    if chunk.endswith(b'\n'):
+        blank -= 1  # The "line" after the final newline does not exist
+    log_stats['total_entries'] += lines - blank
+    
+    # bytes.count() is exact as long as no line holds two level words,
+    # no "user" is spelled USER/uSeR and every "user" is followed by a
+    # space. Chunks that break these rules take the line-by-line path.
+    level_counts = [chunk.count(keyword) for keyword, _ in LOG_LEVELS]
+    user_fields = set(USER_FIELD.findall(chunk))
+    is_simple = (
+        not has_two_keywords_on_a_line(chunk, [keyword for keyword, _ in LOG_LEVELS])
+        and all(separator == b' ' for separator, _ in user_fields)
+        and chunk.lower().count(b'user') == chunk.count(b'user') + chunk.count(b'User')
+    )
+    
+    if is_simple:
+        for (_, key), count in zip(LOG_LEVELS, level_counts):
+            log_stats[key] += count
+        users.update(name for _, name in user_fields)
+    else:
+        scan_log_lines(chunk, log_stats, users)
+    
+    for match in IP_FIELD.finditer(chunk):
+        ip = match.group(1).split(b'IP:')[0].strip()
+        log_stats['suspicious_ips'].append(ip.decode())
+
+def analyze_security_log_mmap(filename, chunk_size=16 * 1024 * 1024):
+    """Analyze a security log through mmap, working on raw bytes.
+    
+    Returns the same statistics as analyze_security_log. Assumes '\n'
+    or '\r\n' line endings and a UTF-8/ASCII log.
+    """
+    
+    log_stats = {
+        'total_entries': 0,
+        'info_count': 0,
+        'warning_count': 0,
+        'error_count': 0,
+        'critical_count': 0,
+        'users': set(),
+        'suspicious_ips': []
+    }
+    users = set()  # Raw bytes; decoded once at the end
+    
+    try:
+        with open(filename, 'rb') as file:
+            file_size = os.fstat(file.fileno()).st_size
+            if file_size == 0:
+                return log_stats  # mmap cannot map an empty file
+            
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                start = 0
+                while start < file_size:
+                    # Extend each chunk to the next newline so no line is cut
+                    end = mm.find(b'\n', min(start + chunk_size, file_size) - 1)
+                    end = file_size if end == -1 else end + 1
+                    scan_log_chunk(mm[start:end], log_stats, users)
+                    start = end
+    
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found")
+        return None
+    except Exception as e:
+        print(f"Error reading file: {e}")
+        return None
+    
+    log_stats['users'] = {user.decode() for user in users}
+    return log_stats
+
+print("How the mmap scanner works:")
+print("- mmap maps the file into memory; the OS pages it in on demand")
+print("- Each chunk is counted with bytes.count() and compiled regexes")
+print("- Lines are never decoded, stripped or split into word lists")
+print("- Only the user names and IPs that are found become strings")
+print()
+
+print("Benchmark: line loop vs mmap scanner")
+line_stats, line_seconds = time_function(analyze_security_log, large_log_path)
+mmap_stats, mmap_seconds = time_function(analyze_security_log_mmap, large_log_path)
+print(f"  analyze_security_log:      {line_seconds:.3f} s")
+print(f"  analyze_security_log_mmap: {mmap_seconds:.3f} s")
+print(f"  Speedup: {line_seconds / mmap_seconds:.1f}x")
+print(f"  Same results: {line_stats == mmap_stats}")
+print()
+
+# Technique 2: Splitting a file across CPU cores
+print("Technique 2: Sharded counting on several CPU cores")
+print()
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+def split_file_ranges(filename, parts):
+    """Split a file into up to `parts` byte ranges that end on a newline"""
+    
+    file_size = os.path.getsize(filename)
+    boundaries = [0]
+    
+    with open(filename, 'rb') as f:
+        for i in range(1, parts):
+            f.seek(file_size * i // parts)
+            f.readline()  # Move to the start of the next full line
+            position = min(f.tell(), file_size)
+            if position > boundaries[-1]:
+                boundaries.append(position)
+    
+    if boundaries[-1] < file_size:
+        boundaries.append(file_size)
+    
+    return list(zip(boundaries, boundaries[1:]))
+
+def join_line_blocks(chunks):
+    """Yield blocks of whole lines from chunks of bytes cut anywhere"""
+    
+    # The pieces of an unfinished line are only joined once its newline
+    # arrives, so a very long line is not copied again for every chunk
+    pending = []
+    for chunk in chunks:
+        cut = chunk.rfind(b'\n') + 1
+        if not cut:
+            pending.append(chunk)
+            continue
+        
+        if pending:
+            pending.append(chunk[:cut])
+            yield b''.join(pending)
+            pending = []
+        else:
+            yield chunk[:cut]
+        if cut < len(chunk):
+            pending.append(chunk[cut:])
+    
+    if pending:  # Last line of the file has no newline
+        yield b''.join(pending)
+
+def read_file_range(filename, start, end, block_size):
+    """Yield bytes [start, end) of a file, block_size bytes at a time"""
+    
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(block_size, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+def iter_line_blocks(filename, start, end, block_size=4 * 1024 * 1024):
+    """Yield blocks of whole lines from bytes [start, end) of a file"""
+    return join_line_blocks(read_file_range(filename, start, end, block_size))
+
+def count_log_block(lines, counts):
+    """Add the line, error and warning counts of a block of lines to counts"""
+    
+    if b'\r' in lines:
+        # Text mode also treats '\r' and '\r\n' as the end of a line
+        lines = lines.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    
+    counts['processed_lines'] += lines.count(b'\n') + (0 if lines.endswith(b'\n') else 1)
+    
+    # Whole blocks are counted at once unless ERROR and WARNING share a
+    # line, where process_large_log_file's "ERROR wins" rule matters
+    if not has_two_keywords_on_a_line(lines, [b'ERROR', b'WARNING']):
+        counts['errors'] += lines.count(b'ERROR')
+        counts['warnings'] += lines.count(b'WARNING')
+        return
+    
+    for line in lines.split(b'\n'):
+        if b'ERROR' in line:
+            counts['errors'] += 1
+        elif b'WARNING' in line:
+            counts['warnings'] += 1
+
+def count_log_range(filename, start, end):
+    """Count lines, errors and warnings in bytes [start, end) of a log"""
+    
+    counts = {'processed_lines': 0, 'errors': 0, 'warnings': 0}
+    for lines in iter_line_blocks(filename, start, end):
+        count_log_block(lines, counts)
+    return counts
+
+def process_large_log_file_parallel(filename, workers=None):
+    """Process a large log file on several cores.
+    
+    Returns exactly the same dictionary as process_large_log_file.
+    """
+    
+    if not os.path.exists(filename):
+        return None
+    
+    workers = workers or os.cpu_count() or 1
+    ranges = split_file_ranges(filename, workers)
+    
+    # Worker processes re-import this script when they are "spawned"
+    # (Windows, macOS), which would re-run every demo above. "fork"
+    # copies the running program instead, so we only use processes there.
+    if workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            partial_results = list(pool.map(
+                count_log_range,
+                [filename] * len(ranges),
+                [start for start, _ in ranges],
+                [end for _, end in ranges]
+            ))
+    else:
+        partial_results = [count_log_range(filename, start, end) for start, end in ranges]
+    
+    # Merge the partial counts from every range
+    result = {'processed_lines': 0, 'errors': 0, 'warnings': 0}
+    for partial in partial_results:
+        for key in result:
+            result[key] += partial[key]
+    
+    return result
+
+print("How sharded processing works:")
+print("- The file is cut into byte ranges, one per worker")
+print("- Each cut is moved forward to the next newline")
+print("- Every worker process counts its own range")
+print("- The small partial results are added together at the end")
+print()
+
+worker_count = os.cpu_count() or 1
+print(f"Benchmark: serial vs {worker_count} worker(s)")
+serial_result, serial_seconds = time_function(process_large_log_file, large_log_path)
+parallel_result, parallel_seconds = time_function(process_large_log_file_parallel, large_log_path)
+print(f"  process_large_log_file:          {serial_seconds:.3f} s")
+print(f"  process_large_log_file_parallel: {parallel_seconds:.3f} s")
+print(f"  Same results: {serial_result == parallel_result}")
+print()
+
+# Technique 3: Incremental processing with a checkpoint file
+print("Technique 3: Resuming from a checkpoint")
+print()
+
+import json
+
+print("Log files are append-only: new entries only ever go at the end.")
+print("A checkpoint remembers how far we got, so the next run only")
+print("reads the bytes that were appended since then.")
+print()
+
+FINGERPRINT_SIZE = 64  # Bytes just before the offset, to spot rewritten files
+
+def read_fingerprint(filename, offset):
+    """Return the bytes just before offset as a hex string"""
+    with open(filename, 'rb') as f:
+        f.seek(max(0, offset - FINGERPRINT_SIZE))
+        return f.read(min(offset, FINGERPRINT_SIZE)).hex()
+
+def load_checkpoint(checkpoint_file, filename):
+    """Load the checkpoint for filename, or None if we must start over.
+    
+    Starting over is needed when there is no checkpoint yet, the log was
+    rotated (a different file now has this name) or it was truncated.
+    """
+    
+    try:
+        with open(checkpoint_file, 'r') as f:
+            checkpoint = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    
+    file_info = os.stat(filename)
+    
+    if (checkpoint.get('inode'), checkpoint.get('device')) != (file_info.st_ino, file_info.st_dev):
+        print(f"  {Path(filename).name} was rotated - starting over")
+        return None
+    
+    if file_info.st_size < checkpoint['offset'] or \
+            read_fingerprint(filename, checkpoint['offset']) != checkpoint['fingerprint']:
+        print(f"  {Path(filename).name} was truncated or rewritten - starting over")
+        return None
+    
+    return checkpoint
+
+def save_checkpoint(checkpoint_file, filename, offset, stats):
+    """Save the read position and partial results for filename"""
+    
+    file_info = os.stat(filename)
+    checkpoint = {
+        'filename': str(filename),
+        'inode': file_info.st_ino,
+        'device': file_info.st_dev,
+        'offset': offset,
+        'fingerprint': read_fingerprint(filename, offset),
+        'stats': stats
+    }
+    
+    # Write to a temporary file first and then rename it, so a crash
+    # never leaves a half-written checkpoint behind
+    temp_file = Path(str(checkpoint_file) + '.tmp')
+    with open(temp_file, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(temp_file, checkpoint_file)
+
+def end_of_complete_lines(filename, start):
+    """Return the offset just after the last newline at or after start.
+    
+    A line without a newline may still be being written, so it is
+    left for the next run.
+    """
+    
+    position = os.path.getsize(filename)
+    with open(filename, 'rb') as f:
+        while position > start:
+            step = min(64 * 1024, position - start)
+            f.seek(position - step)
+            newline = f.read(step).rfind(b'\n')
+            if newline != -1:
+                return position - step + newline + 1
+            position -= step
+    return start
+
+def analyze_security_log_incremental(filename, checkpoint_file):
+    """Analyze only the new part of a security log.
+    
+    Returns the statistics for the whole file, like analyze_security_log,
+    combining the saved results with the newly appended lines.
+    """
+    
+    try:
+        checkpoint = load_checkpoint(checkpoint_file, filename)
+        
+        if checkpoint:
+            start = checkpoint['offset']
+            log_stats = checkpoint['stats']
+            log_stats['users'] = set(log_stats['users'])
+        else:
+            start = 0
+            log_stats = {
+                'total_entries': 0,
+                'info_count': 0,
+                'warning_count': 0,
+                'error_count': 0,
+                'critical_count': 0,
+                'users': set(),
+                'suspicious_ips': []
+            }
+        
+        end = end_of_complete_lines(filename, start)
+        users = set()
+        for lines in iter_line_blocks(filename, start, end):
+            scan_log_chunk(lines, log_stats, users)
+        log_stats['users'].update(user.decode() for user in users)
+        
+        saved_stats = dict(log_stats, users=sorted(log_stats['users']))
+        save_checkpoint(checkpoint_file, filename, end, saved_stats)
+    
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found")
+        return None
+    except Exception as e:
+        print(f"Error reading file: {e}")
+        return None
+    
+    print(f"  Read {end - start} new bytes (offset {start} -> {end})")
+    return log_stats
+
+def process_large_log_file_incremental(filename, checkpoint_file):
+    """Like process_large_log_file, but only reads newly appended lines"""
+    
+    try:
+        checkpoint = load_checkpoint(checkpoint_file, filename)
+        start = checkpoint['offset'] if checkpoint else 0
+        result = checkpoint['stats'] if checkpoint else {
+            'processed_lines': 0,
+            'errors': 0,
+            'warnings': 0
+        }
+        
+        end = end_of_complete_lines(filename, start)
+        new_counts = count_log_range(filename, start, end)
+        for key in result:
+            result[key] += new_counts[key]
+        
+        save_checkpoint(checkpoint_file, filename, end, result)
+    
+    except FileNotFoundError:
+        return None
+    
+    return result
+
+print("Incremental analysis example:")
+live_log_path = current_dir / 'live_security_log.txt'
+live_checkpoint_path = current_dir / 'live_security_log.checkpoint.json'
+live_log_path.write_text(sample_log_content + "\n")
+if live_checkpoint_path.exists():
+    live_checkpoint_path.unlink()
+
+print("Run 1 (no checkpoint yet):")
+live_stats = analyze_security_log_incremental(live_log_path, live_checkpoint_path)
+print(f"  Total entries: {live_stats['total_entries']}")
+
+with open(live_log_path, 'a') as f:
+    f.write("2025-10-04 09:25:02 ERROR Failed login attempt for user mallory\n")
+    f.write("2025-10-04 09:25:09 CRITICAL Security breach detected - IP: 10.0.0.66\n")
+
+print("Run 2 (two lines appended):")
+live_stats = analyze_security_log_incremental(live_log_path, live_checkpoint_path)
+print(f"  Total entries: {live_stats['total_entries']}")
+print(f"  Users: {', '.join(sorted(live_stats['users']))}")
+print(f"  Suspicious IPs: {', '.join(live_stats['suspicious_ips'])}")
+print(f"  Same as full scan: {live_stats == analyze_security_log(live_log_path)}")
+
+# Simulate log rotation: a brand new file takes over the old name
+rotated_path = current_dir / 'live_security_log.txt.new'
+rotated_path.write_text("2025-10-05 00:00:01 INFO User alice logged in successfully\n")
+os.replace(rotated_path, live_log_path)
+
+print("Run 3 (log was rotated):")
+live_stats = analyze_security_log_incremental(live_log_path, live_checkpoint_path)
+print(f"  Total entries: {live_stats['total_entries']}")
+live_log_path.unlink()
+live_checkpoint_path.unlink()
+print()
+
+# Technique 4: Reading compressed logs directly
+print("Technique 4: Streaming compressed (.gz/.bz2/.xz) logs")
+print()
+
+import bz2
+import gzip
+import lzma
+import queue
+import shutil
+import threading
+import zlib
+
+print("Rotated logs are usually compressed. Instead of unpacking them")
+print("to disk first, we can decompress while we read. A background")
+print("thread decompresses the next chunks while the main thread is")
+print("still counting the previous ones.")
+print()
+
+COMPRESSED_OPENERS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+MAGIC_BYTES = [
+    (b'\x1f\x8b', gzip.open),
+    (b'BZh', bz2.open),
+    (b'\xfd7zXZ\x00', lzma.open),
+]
+
+def open_log_binary(filename):
+    """Open a log for reading bytes, decompressing it if needed.
+    
+    The file extension decides the format; files with an unknown
+    extension are recognised by their first bytes ("magic bytes").
+    """
+    
+    opener = COMPRESSED_OPENERS.get(Path(filename).suffix.lower())
+    if opener is None:
+        with open(filename, 'rb') as f:
+            start_of_file = f.read(6)
+        for magic, magic_opener in MAGIC_BYTES:
+            if start_of_file.startswith(magic):
+                opener = magic_opener
+                break
+    
+    return opener(filename, 'rb') if opener else open(filename, 'rb')
+
+def is_compressed_log(filename):
+    """Return True if open_log_binary would decompress this file"""
+    
+    if Path(filename).suffix.lower() in COMPRESSED_OPENERS:
+        return True
+    with open(filename, 'rb') as f:
+        start_of_file = f.read(6)
+    return any(start_of_file.startswith(magic) for magic, _ in MAGIC_BYTES)
+
+def read_chunks_in_background(filename, chunk_size=1024 * 1024, max_queued=8):
+    """Yield decompressed chunks of a log, read by a background thread.
+    
+    The queue holds at most max_queued chunks, so a slow consumer
+    pauses the reader instead of filling up the memory.
+    """
+    
+    chunks = queue.Queue(maxsize=max_queued)
+    stop = threading.Event()
+    end_of_file = object()
+    
+    def put(item):
+        # Wait for free space, but give up if the consumer has stopped
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def reader():
+        try:
+            with open_log_binary(filename) as f:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk or not put(chunk):
+                        break
+        except Exception as e:
+            put(e)  # Re-raised in the consumer
+        put(end_of_file)
+    
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    
+    try:
+        while True:
+            item = chunks.get()
+            if item is end_of_file:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+def process_any_log_file(filename):
+    """process_large_log_file for plain, .gz, .bz2 and .xz logs"""
+    
+    try:
+        if not is_compressed_log(filename):
+            return process_large_log_file(filename)
+        
+        counts = {'processed_lines': 0, 'errors': 0, 'warnings': 0}
+        for lines in join_line_blocks(read_chunks_in_background(filename)):
+            count_log_block(lines, counts)
+    
+    except (OSError, EOFError, lzma.LZMAError, zlib.error):  # Missing or corrupt file
+        return None
+    
+    return counts
+
+def process_by_decompressing_to_disk(filename):
+    """The slow alternative: unpack to a temporary file, then process it"""
+    
+    unpacked_path = Path(str(filename) + '.unpacked')
+    try:
+        with open_log_binary(filename) as source, open(unpacked_path, 'wb') as target:
+            shutil.copyfileobj(source, target)
+        return process_large_log_file(unpacked_path)
+    finally:
+        if unpacked_path.exists():
+            unpacked_path.unlink()
+
+print("Batch processing plain and compressed logs together:")
+plain_log = logs_dir / 'security_log.txt'
+compressed_logs = [
+    logs_dir / 'security_log.txt.1.gz',
+    logs_dir / 'security_log.txt.2.bz2',
+    logs_dir / 'security_log.txt.3.xz',
+    logs_dir / 'security_log.txt.4',  # gzip data without an extension
+]
+for compressed_path, opener in zip(compressed_logs, [gzip.open, bz2.open, lzma.open, gzip.open]):
+    with opener(compressed_path, 'wb') as f:
+        f.write(plain_log.read_bytes())
+
+batch_results = process_file_batch([plain_log] + compressed_logs, process_function=process_any_log_file)
+for result in batch_results:
+    print(f"  {result['filename'].name}: {result['processed_lines']} lines, "
+          f"{result['errors']} errors, {result['warnings']} warnings")
+for compressed_path in compressed_logs:
+    compressed_path.unlink()
+print()
+
+print("Benchmark: decompress to disk first vs streaming")
+large_gz_path = Path(str(large_log_path) + '.gz')
+with open(large_log_path, 'rb') as source, gzip.open(large_gz_path, 'wb') as target:
+    shutil.copyfileobj(source, target)
+
+disk_result, disk_seconds = time_function(process_by_decompressing_to_disk, large_gz_path)
+stream_result, stream_seconds = time_function(process_any_log_file, large_gz_path)
+print(f"  Decompress to disk, then process: {disk_seconds:.3f} s")
+print(f"  Streaming with reader thread:     {stream_seconds:.3f} s")
+print(f"  Same results: {disk_result == stream_result == process_large_log_file(large_log_path)}")
+large_gz_path.unlink()
+print()
+
+# Technique 5: Processing many files at once
+print("Technique 5: Concurrent batch processing with a worker pool")
+print()
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+print("process_file_batch handles one file at a time and prints a line")
+print("for each of them. With thousands of small per-host logs, the")
+print("waiting for the disk and the printing add up.")
+print("- Threads: good when most time is spent waiting for I/O")
+print("- Processes: good when most time is spent parsing (CPU)")
+print()
+
+def make_executor(workers, use_processes=False):
+    """Create a thread pool, or a process pool where 'fork' is available"""
+    
+    # Like technique 2: "spawned" processes would re-run this script
+    if use_processes and 'fork' in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+    return ThreadPoolExecutor(max_workers=workers)
+
+def process_file_batch_concurrent(filenames, workers=4, use_processes=False,
+                                  ordered=True, process_function=process_large_log_file,
+                                  failed=None, progress_interval=1.0):
+    """Process many files with a pool of workers and yield the results.
+    
+    Results come out in input order (ordered=True) or as soon as each
+    file is done (ordered=False). Files that fail are added to the
+    `failed` list as (filename, reason) instead of being printed.
+    Progress is printed at most once every progress_interval seconds.
+    """
+    
+    filenames = list(filenames)
+    total_files = len(filenames)
+    if failed is None:
+        failed = []
+    
+    max_in_flight = workers * 2  # Bounds memory, even for huge batches
+    pending = {}                 # future -> position in filenames
+    finished = {}                # position -> result, waiting to be yielded
+    next_to_submit = 0
+    next_to_yield = 0
+    completed = 0
+    last_report = time.monotonic()
+    
+    with make_executor(workers, use_processes) as executor:
+        while next_to_submit < total_files or pending:
+            # Keep the pool busy, but never too far ahead of the consumer
+            while next_to_submit < total_files and len(pending) + len(finished) < max_in_flight:
+                future = executor.submit(process_function, filenames[next_to_submit])
+                pending[future] = next_to_submit
+                next_to_submit += 1
+            
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                position = pending.pop(future)
+                filename = filenames[position]
+                completed += 1
+                
+                try:
+                    result = future.result()
+                    reason = "no result"
+                except Exception as e:
+                    result = None
+                    reason = str(e)
+                
+                if result:
+                    result['filename'] = filename
+                else:
+                    failed.append((filename, reason))
+                
+                if ordered:
+                    finished[position] = result
+                elif result:
+                    yield result
+            
+            # In ordered mode, release every result that is now next in line
+            while next_to_yield in finished:
+                result = finished.pop(next_to_yield)
+                next_to_yield += 1
+                if result:
+                    yield result
+            
+            now = time.monotonic()
+            if now - last_report >= progress_interval:
+                print(f"  Progress: {completed}/{total_files} files ({len(failed)} failed)")
+                last_report = now
+    
+    print(f"  Done: {completed}/{total_files} files ({len(failed)} failed)")
+
+print("Creating 200 small per-host log files...")
+hosts_dir = data_dir / 'hosts'
+hosts_dir.mkdir(parents=True, exist_ok=True)
+host_logs = []
+for host_number in range(200):
+    host_log = hosts_dir / f'host{host_number:03d}.log'
+    host_log.write_text(sample_log_content + "\n")
+    host_logs.append(host_log)
+host_logs.insert(50, hosts_dir / 'missing_host.log')  # This one will fail
+print()
+
+print("Threads, results in input order:")
+failed_files = []
+batch_start = time.perf_counter()
+ordered_results = list(process_file_batch_concurrent(host_logs, workers=8, failed=failed_files))
+print(f"  {len(ordered_results)} results in {time.perf_counter() - batch_start:.3f} s")
+print(f"  First result: {ordered_results[0]['filename'].name}")
+print(f"  In input order: {[r['filename'] for r in ordered_results] == [f for f in host_logs if f.exists()]}")
+for filename, reason in failed_files:
+    print(f"  Failed: {filename.name} ({reason})")
+print()
+
+print("Processes, results in completion order:")
+total_lines = 0
+for result in process_file_batch_concurrent(host_logs, workers=4, use_processes=True, ordered=False):
+    total_lines += result['processed_lines']
+print(f"  Total lines in all hosts: {total_lines}")
+shutil.rmtree(hosts_dir)
+print()
+
+# Technique 6: A columnar cache of parsed log files
+print("Technique 6: Caching parsed logs as compact columns")
+print()
+
+import array
+import ast
+import calendar
+import hashlib
+import sys
+from datetime import date
+
+print("Parsing text is the expensive part of log analysis. If we keep")
+print("asking new questions about the same archive, we can parse it")
+print("once and save the result as columns of plain numbers:")
+print("- timestamp: seconds since 1970 (int64)")
+print("- level:     0=none 1=INFO 2=WARNING 3=ERROR 4=CRITICAL (uint8)")
+print("- user, ip:  number of the entry in a list of distinct values")
+print()
+
+COLUMN_CACHE_MAGIC = b'LOGCOLS2'
+LEVEL_CODES = {'INFO': 1, 'WARNING': 2, 'ERROR': 3, 'CRITICAL': 4}
+LEVEL_STATS_KEYS = {1: 'info_count', 2: 'warning_count', 3: 'error_count', 4: 'critical_count'}
+NO_VALUE = -1  # user/ip column value for lines without a user or IP
+NO_TIMESTAMP = -2 ** 63  # Smallest int64: a timestamp column value no real date can have
+LOG_COLUMN_NAMES = ('timestamps', 'levels', 'user_ids', 'ip_ids')
+
+def course_function_source(filename, function_name, helpers=()):
+    """Return the source of one function of a course file, plus the
+    helper functions and constants (by name) that it needs"""
+    
+    source = (Path(__file__).parent / filename).read_text()
+    wanted = {function_name, *helpers}
+    parts = []
+    for node in ast.parse(source).body:
+        if isinstance(node, ast.FunctionDef):
+            names = [node.name]
+        elif isinstance(node, ast.Assign):
+            names = [target.id for target in node.targets if isinstance(target, ast.Name)]
+        else:
+            continue
+        if wanted.intersection(names):
+            parts.append(ast.get_source_segment(source, node))
+    return '\n\n'.join(parts)
+
+# Session 08's timestamp_to_epoch() reads the timestamps, so both
+# sessions accept and reject exactly the same text
+timestamp_namespace = {'date': date}
+exec(course_function_source('008_functions_exceptions_and_files_explained.py',
+                            'timestamp_to_epoch', ('EPOCH_ORDINAL',)), timestamp_namespace)
+timestamp_to_epoch = timestamp_namespace['timestamp_to_epoch']
+
+def parse_log_timestamp(line, day_cache):
+    """Turn 'YYYY-MM-DD HH:MM:SS ...' (or a date alone: midnight) into
+    seconds since 1970 (UTC), or NO_TIMESTAMP if it is not a timestamp"""
+    try:
+        return timestamp_to_epoch(line, day_cache)
+    except ValueError:
+        return NO_TIMESTAMP
+
+def build_log_column_cache(filename, cache_file):
+    """Parse a security log once and save it as a column cache file.
+    
+    Returns False (and saves nothing) if the log changed while it was
+    being parsed: its columns would not match the recorded size and time.
+    """
+    
+    file_info = os.stat(filename)  # Before reading, so no line is missed
+    timestamps = array.array('q')
+    levels = array.array('B')
+    user_ids = array.array('i')
+    ip_ids = array.array('i')
+    user_numbers = {}  # name -> number, in order of first appearance
+    ip_numbers = {}
+    day_cache = [None, 0]
+    
+    with open(filename, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            
+            timestamps.append(parse_log_timestamp(line, day_cache))
+            level, users, ip = parse_security_line(line)
+            levels.append(LEVEL_CODES.get(level, 0))
+            
+            user_id = NO_VALUE
+            for user in users:
+                number = user_numbers.setdefault(user, len(user_numbers))
+                if user_id == NO_VALUE:
+                    user_id = number  # The column keeps the first user
+            user_ids.append(user_id)
+            
+            ip_ids.append(NO_VALUE if ip is None else ip_numbers.setdefault(ip, len(ip_numbers)))
+    
+    file_info_after = os.stat(filename)
+    if (file_info_after.st_size, file_info_after.st_mtime_ns) != (file_info.st_size, file_info.st_mtime_ns):
+        return False
+    
+    header = json.dumps({
+        'path': str(Path(filename).resolve()),
+        'size': file_info.st_size,
+        'mtime_ns': file_info.st_mtime_ns,
+        'byteorder': sys.byteorder,
+        'rows': len(levels),
+        'users': list(user_numbers),
+        'ips': list(ip_numbers)
+    }).encode()
+    
+    # Layout: magic, header length, header, then the four columns.
+    # Padding keeps every column 8-byte aligned so it can be read in place.
+    def padding(position):
+        return b'\x00' * (-position % 8)
+    
+    # Write to a temporary file first and then rename it, so an
+    # interrupted build never leaves a short cache behind
+    temp_file = Path(str(cache_file) + '.tmp')
+    with open(temp_file, 'wb') as f:
+        f.write(COLUMN_CACHE_MAGIC)
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(header)
+        for column in (timestamps, levels, user_ids, ip_ids):
+            f.write(padding(f.tell()))
+            column.tofile(f)
+    os.replace(temp_file, cache_file)
+    return True
+
+def map_log_column_cache(cache_file):
+    """mmap a cache file and read its header (None if it is not a cache)"""
+    
+    try:
+        with open(cache_file, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # Missing, unreadable or empty file
+        return None
+    
+    try:
+        if mm[:8] != COLUMN_CACHE_MAGIC:
+            raise ValueError("not a column cache")
+        header_length = int.from_bytes(mm[8:16], 'little')
+        header = json.loads(mm[16:16 + header_length])
+    except ValueError:
+        mm.close()
+        return None
+    
+    header['columns_start'] = 16 + header_length
+    return mm, header
+
+def load_log_column_cache(filename, cache_dir):
+    """Return the columns of a parsed log, building the cache if needed.
+    
+    The cache is only reused while the log has the same path, size and
+    modification time. Columns are memoryviews over an mmap of the
+    cache file, so loading does not copy them. Returns None if the log
+    changed while the cache was being built.
+    """
+    
+    file_info = os.stat(filename)
+    path = str(Path(filename).resolve())
+    cache_file = Path(cache_dir) / (hashlib.sha1(path.encode()).hexdigest() + '.logcols')
+    expected = (path, file_info.st_size, file_info.st_mtime_ns, sys.byteorder)
+    
+    columns = None
+    mapped = map_log_column_cache(cache_file)
+    if mapped:
+        mm, header = mapped
+        found = tuple(header.get(key) for key in ('path', 'size', 'mtime_ns', 'byteorder'))
+        if found == expected:
+            columns = log_columns_from_map(mm, header)
+        if columns is None:
+            mm.close()  # The log changed, or the cache file is damaged
+    
+    if columns is None:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        if not build_log_column_cache(filename, cache_file):
+            print(f"{filename} changed while it was being cached; try again later")
+            return None
+        columns = log_columns_from_map(*map_log_column_cache(cache_file))
+    
+    return columns
+
+def log_columns_from_map(mm, header):
+    """Slice the columns out of a mapped cache file.
+    
+    Returns None if any column holds fewer than 'rows' items, for
+    example because the file was cut short.
+    """
+    
+    rows = header['rows']
+    view = memoryview(mm)
+    columns = {'rows': rows, 'users': header['users'], 'ips': header['ips'], 'mmap': mm}
+    position = header['columns_start']
+    for name, type_code in [('timestamps', 'q'), ('levels', 'B'), ('user_ids', 'i'), ('ip_ids', 'i')]:
+        position += -position % 8
+        item_size = array.array(type_code).itemsize
+        column = view[position:position + rows * item_size]
+        if len(column) != rows * item_size:
+            column.release()
+            for earlier in LOG_COLUMN_NAMES:
+                if earlier in columns:
+                    columns[earlier].release()
+            view.release()
+            return None
+        columns[name] = column.cast(type_code)
+        position += rows * item_size
+    
+    view.release()
+    return columns
+
+def close_log_column_cache(columns):
+    """Release the memoryviews and the mmap behind a column cache"""
+    for name in LOG_COLUMN_NAMES:
+        columns[name].release()
+    columns['mmap'].close()
+
+def column_level_counts(columns):
+    """Count log levels using the level column only"""
+    levels = columns['levels'].tobytes()  # 1 byte per line; counted in C
+    return {key: levels.count(bytes([code])) for code, key in LEVEL_STATS_KEYS.items()}
+
+def column_log_stats(columns):
+    """Rebuild the analyze_security_log statistics from a column cache"""
+    
+    log_stats = {'total_entries': columns['rows']}
+    log_stats.update(column_level_counts(columns))
+    log_stats['users'] = set(columns['users'])
+    ips = columns['ips']
+    log_stats['suspicious_ips'] = [ips[ip_id] for ip_id in columns['ip_ids'] if ip_id != NO_VALUE]
+    return log_stats
+
+cache_dir = data_dir / 'cache'
+print("First run (parses the log and writes the cache):")
+columns, build_seconds = time_function(load_log_column_cache, large_log_path, cache_dir)
+close_log_column_cache(columns)
+print(f"  {build_seconds:.3f} s")
+
+print("Second run (maps the existing cache):")
+columns, load_seconds = time_function(load_log_column_cache, large_log_path, cache_dir)
+print(f"  {load_seconds:.4f} s for {columns['rows']} rows")
+
+level_counts, query_seconds = time_function(column_level_counts, columns)
+print(f"  Level counts in {query_seconds:.4f} s: {level_counts}")
+print(f"  Distinct users: {', '.join(sorted(columns['users']))}")
+print(f"  Same statistics as analyze_security_log: "
+      f"{column_log_stats(columns) == analyze_security_log(large_log_path)}")
+close_log_column_cache(columns)
+print()
+
+# Technique 7: Bounded memory for users and IPs
+print("Technique 7: Sketches for heavy hitters and distinct counts")
+print()
+
+import heapq
+import math
+
+print("log_stats['users'] is a set and log_stats['suspicious_ips'] is a")
+print("list with every duplicate. During an attack with millions of")
+print("different IPs both grow without limit. Sketches answer the")
+print("questions we actually ask with a fixed amount of memory:")
+print("- Space-Saving: which IPs/users appear most often (top-K)")
+print("- HyperLogLog:  roughly how many different IPs/users there are")
+print()
+
+def new_space_saving(capacity):
+    """Create a Space-Saving top-K counter that keeps `capacity` items.
+    
+    After N items, every reported count is at most N / capacity too
+    high (the 'error' stored with it is a per-item upper bound), and
+    any item that really occurred more than N / capacity times is
+    guaranteed to be in the table.
+    """
+    return {'capacity': capacity, 'counts': {}, 'errors': {}, 'heap': [], 'total': 0}
+
+def space_saving_add(sketch, item):
+    """Count one occurrence of item"""
+    
+    counts = sketch['counts']
+    sketch['total'] += 1
+    
+    if item in counts:
+        counts[item] += 1
+        return
+    
+    if len(counts) < sketch['capacity']:
+        counts[item] = 1
+        sketch['errors'][item] = 0
+        heapq.heappush(sketch['heap'], (1, item))
+        return
+    
+    # Table is full: replace the item with the smallest count. The heap
+    # holds old counts, so refresh entries until the top one is current.
+    heap = sketch['heap']
+    while True:
+        count, smallest = heap[0]
+        if counts[smallest] == count:
+            break
+        heapq.heapreplace(heap, (counts[smallest], smallest))
+    
+    del counts[smallest]
+    del sketch['errors'][smallest]
+    counts[item] = count + 1
+    sketch['errors'][item] = count  # item may have been seen up to `count` times
+    heapq.heapreplace(heap, (count + 1, item))
+
+def space_saving_top(sketch, k):
+    """Return the k most frequent items as (item, count, max_error)"""
+    counts, errors = sketch['counts'], sketch['errors']
+    top = heapq.nlargest(k, counts.items(), key=lambda pair: pair[1])
+    return [(item, count, errors[item]) for item, count in top]
+
+def new_hyperloglog(precision=12):
+    """Create a HyperLogLog distinct counter with 2**precision registers.
+    
+    Uses 2**precision bytes. The typical relative error of the estimate
+    is 1.04 / sqrt(2**precision), e.g. about 1.6% for precision 12.
+    """
+    return {'precision': precision, 'registers': bytearray(2 ** precision)}
+
+def hyperloglog_add(sketch, item):
+    """Add an item (str) to a HyperLogLog sketch"""
+    
+    precision = sketch['precision']
+    value = int.from_bytes(hashlib.blake2b(item.encode(), digest_size=8).digest(), 'big')
+    register = value >> (64 - precision)                 # First bits pick a register
+    rest = value & ((1 << (64 - precision)) - 1)         # Remaining bits
+    rank = (64 - precision) - rest.bit_length() + 1      # Position of the first 1-bit
+    if rank > sketch['registers'][register]:
+        sketch['registers'][register] = rank
+
+def hyperloglog_count(sketch):
+    """Estimate how many different items were added"""
+    
+    registers = sketch['registers']
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / sum(2.0 ** -r for r in registers)
+    
+    empty = registers.count(0)
+    if estimate <= 2.5 * m and empty:
+        estimate = m * math.log(m / empty)  # Small numbers: linear counting
+    
+    return round(estimate)
+
+def analyze_security_log_sketched(filename, top_k=100, hll_precision=12, report_top=10):
+    """Analyze a security log with bounded memory for users and IPs.
+    
+    Returns the same counts as analyze_security_log, but 'users' and
+    'suspicious_ips' are replaced by 'top_users', 'distinct_users',
+    'top_suspicious_ips' and 'distinct_suspicious_ips'. top_k items are
+    tracked, and the report_top most frequent of them are returned.
+    Memory is capped at roughly 2 * (top_k * 200 + 2**hll_precision) bytes.
+    """
+    
+    log_stats = {
+        'total_entries': 0,
+        'info_count': 0,
+        'warning_count': 0,
+        'error_count': 0,
+        'critical_count': 0
+    }
+    user_counter, user_distinct = new_space_saving(top_k), new_hyperloglog(hll_precision)
+    ip_counter, ip_distinct = new_space_saving(top_k), new_hyperloglog(hll_precision)
+    
+    try:
+        with open(filename, 'r') as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                
+                log_stats['total_entries'] += 1
+                level, users, ip = parse_security_line(line)
+                
+                if level:
+                    log_stats[level.lower() + '_count'] += 1
+                
+                for user in users:
+                    space_saving_add(user_counter, user)
+                    hyperloglog_add(user_distinct, user)
+                
+                if ip is not None:
+                    space_saving_add(ip_counter, ip)
+                    hyperloglog_add(ip_distinct, ip)
+    
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found")
+        return None
+    except Exception as e:
+        print(f"Error reading file: {e}")
+        return None
+    
+    log_stats['top_users'] = space_saving_top(user_counter, report_top)
+    log_stats['distinct_users'] = hyperloglog_count(user_distinct)
+    log_stats['top_suspicious_ips'] = space_saving_top(ip_counter, report_top)
+    log_stats['distinct_suspicious_ips'] = hyperloglog_count(ip_distinct)
+    return log_stats
+
+print("Simulating an attack burst: 50,000 alerts from many different IPs")
+attack_log_path = current_dir / 'attack_security_log.txt'
+attack_rng = random.Random(7)
+with open(attack_log_path, 'w') as f:
+    for i in range(50_000):
+        if attack_rng.random() < 0.3:
+            ip = f"203.0.113.{attack_rng.randint(1, 5)}"  # A few very busy attackers
+        else:
+            ip = f"10.{attack_rng.randint(0, 255)}.{attack_rng.randint(0, 255)}.1"
+        f.write(f"2025-10-04 11:00:00 CRITICAL Security breach detected - IP: {ip}\n")
+
+exact_stats = analyze_security_log(attack_log_path)
+sketch_stats = analyze_security_log_sketched(attack_log_path, top_k=50, hll_precision=12, report_top=5)
+exact_distinct = len(set(exact_stats['suspicious_ips']))
+
+print(f"  Exact distinct IPs:     {exact_distinct}")
+print(f"  Estimated distinct IPs: {sketch_stats['distinct_suspicious_ips']} "
+      f"(expected error about {1.04 / math.sqrt(2 ** 12):.1%})")
+print("  Top 5 IPs (count, max overestimate) vs exact count:")
+for ip, count, max_error in sketch_stats['top_suspicious_ips']:
+    print(f"    {ip:15} {count:6} (+{max_error})  exact: {exact_stats['suspicious_ips'].count(ip)}")
+print()
+
+# Technique 8: Parsing lines without creating strings
+print("Technique 8: Zero-copy parsing with readinto() and offsets")
+print()
+
+import tracemalloc
+
+print("for line in file: ... line.split() creates a new str for the")
+print("line and one for every field, even if we only look at one field.")
+print("Instead we can read into one reusable bytearray, find fields by")
+print("their offsets, and decode only the fields we actually need.")
+print()
+
+LOG_FIELDS = ('date', 'time', 'level', 'message')
+
+def iter_line_offsets(filename, buffer_size=1024 * 1024):
+    """Yield (buffer, start, end) for every line of a file.
+    
+    All lines share one bytearray that is refilled with readinto(), so
+    a line is only valid until the next one is requested. Use the
+    offsets (or copy the bytes you need) before moving on.
+    """
+    
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    filled = 0
+    
+    with open(filename, 'rb', buffering=0) as f:
+        while True:
+            bytes_read = f.readinto(view[filled:])
+            if not bytes_read:
+                if filled:  # Last line without a newline
+                    yield buffer, 0, filled - 1 if buffer[filled - 1] == 13 else filled
+                break
+            filled += bytes_read
+            
+            start = 0
+            while True:
+                newline = buffer.find(b'\n', start, filled)
+                if newline == -1:
+                    break
+                end = newline - 1 if newline > start and buffer[newline - 1] == 13 else newline
+                yield buffer, start, end  # 13 = '\r' of a Windows line ending
+                start = newline + 1
+            
+            if start == 0 and filled == len(buffer):
+                # One line is longer than the buffer: make the buffer bigger
+                view.release()
+                buffer.extend(bytes(len(buffer)))
+                view = memoryview(buffer)
+            else:
+                # Move the unfinished last line to the front of the buffer
+                view[:filled - start] = view[start:filled]
+                filled -= start
+    
+    view.release()
+
+def find_log_fields(buffer, start, end):
+    """Return the (start, end) offsets of the date, time, level and
+    message fields of a 'DATE TIME LEVEL MESSAGE' line, or None"""
+    
+    offsets = []
+    field_start = start
+    for _ in range(3):  # date, time and level end at a space
+        field_end = buffer.find(b' ', field_start, end)
+        if field_end == -1:
+            return None
+        offsets.append((field_start, field_end))
+        field_start = field_end + 1
+    offsets.append((field_start, end))  # The message is the rest
+    return offsets
+
+def read_log_fields(filename, fields=('level',)):
+    """Yield a tuple with only the requested fields of each log line.
+    
+    Only the requested fields are decoded into strings.
+    """
+    
+    wanted = [LOG_FIELDS.index(name) for name in fields]
+    for buffer, start, end in iter_line_offsets(filename):
+        offsets = find_log_fields(buffer, start, end)
+        if offsets:
+            yield tuple(buffer[offsets[i][0]:offsets[i][1]].decode() for i in wanted)
+
+def count_levels_zero_copy(filename):
+    """Count the level field of every line without decoding anything"""
+    
+    counts = {b'INFO': 0, b'WARNING': 0, b'ERROR': 0, b'CRITICAL': 0}
+    levels_by_length = {len(level): level for level in counts}  # All lengths differ
+    
+    for buffer, start, end in iter_line_offsets(filename):
+        # The level is the third field: it starts after the second space
+        first_space = buffer.find(b' ', start, end)
+        if first_space == -1:
+            continue
+        level_start = buffer.find(b' ', first_space + 1, end) + 1
+        if level_start == 0:
+            continue
+        level_end = buffer.find(b' ', level_start, end)
+        if level_end == -1:
+            level_end = end
+        level = levels_by_length.get(level_end - level_start)
+        if level and buffer.startswith(level, level_start):
+            counts[level] += 1
+    
+    return {level.decode(): count for level, count in counts.items()}
+
+def count_levels_with_split(filename):
+    """The usual way: decode every line and split it into fields"""
+    
+    counts = {'INFO': 0, 'WARNING': 0, 'ERROR': 0, 'CRITICAL': 0}
+    with open(filename, 'r') as f:
+        for line in f:
+            parts = line.rstrip('\r\n').split(' ', 3)
+            if len(parts) >= 3 and parts[2] in counts:
+                counts[parts[2]] += 1
+    return counts
+
+def memory_per_line(make_objects, lines=10_000):
+    """Average bytes allocated per line, measured with tracemalloc.
+    
+    make_objects(n) must return everything it created for n lines, so
+    that tracemalloc still sees it when we measure.
+    """
+    tracemalloc.start()
+    kept = make_objects(lines)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return allocated / lines
+
+def split_objects(n):
+    kept = []
+    with open(large_log_path, 'r') as f:
+        for line, _ in zip(f, range(n)):
+            kept.append((line, line.split(' ', 3)))  # The line + list of 4 fields
+    return kept
+
+def zero_copy_objects(n):
+    return [fields for fields, _ in zip(read_log_fields(large_log_path), range(n))]
+
+print("First entries of the sample log, decoding only date and level:")
+for entry in list(read_log_fields(log_files_path, fields=('date', 'level')))[:3]:
+    print(f"  {entry}")
+print()
+
+print("Memory allocated per line (tracemalloc, 10,000 lines):")
+print(f"  split() - whole line and all fields: {memory_per_line(split_objects):.0f} bytes")
+print(f"  readinto() - only the level field:   {memory_per_line(zero_copy_objects):.0f} bytes")
+print()
+
+print("Counting levels in the large log:")
+split_counts, split_seconds = time_function(count_levels_with_split, large_log_path)
+zero_copy_counts, zero_copy_seconds = time_function(count_levels_zero_copy, large_log_path)
+print(f"  split():   {split_seconds:.3f} s")
+print(f"  zero-copy: {zero_copy_seconds:.3f} s (no str or bytes objects per line)")
+print(f"  Same counts: {split_counts == zero_copy_counts}")
+print()
+
+# Technique 9: One pass, many questions
+print("Technique 9: A pipeline of generators shared by many aggregators")
+print()
+
+print("analyze_security_log() and process_large_log_file() each open")
+print("and read the file on their own, so three reports cost three")
+print("passes. Instead we build the work from small stages:")
+print("  read -> parse -> filter -> aggregate")
+print("read, parse and filter are generators; the aggregate stage pulls")
+print("every entry once and hands it to all aggregators.")
+print()
+
+def read_log_lines(filename):
+    """Read stage: yield every line of a file (newline included)"""
+    with open(filename, 'r') as f:
+        yield from f
+
+def parse_log_entry(line):
+    """Parse 'DATE TIME LEVEL MESSAGE' into the same dictionary that
+    process_security_log() builds, keeping the original line"""
+    
+    parts = line.strip().split(' ', 3)
+    if len(parts) < 4:
+        entry = {'error': 'Invalid log format'}
+    else:
+        level = parts[2].upper()
+        entry = {
+            'timestamp': f"{parts[0]} {parts[1]}",
+            'level': level,
+            'message': parts[3],
+            'severity': 'HIGH' if level in ['ERROR', 'CRITICAL'] else 'LOW'
+        }
+    entry['line'] = line
+    return entry
+
+def parse_log_lines(lines, parse=parse_log_entry):
+    """Parse stage: turn every line into an entry dictionary"""
+    for line in lines:
+        yield parse(line)
+
+def filter_log_entries(entries, predicate):
+    """Filter stage: only pass on entries for which predicate is true"""
+    for entry in entries:
+        if predicate(entry):
+            yield entry
+
+def aggregate_log_entries(entries, aggregators):
+    """Aggregate stage: feed every entry to every aggregator in one pass.
+    
+    aggregators maps a report name to an aggregator; returns a
+    dictionary with the result of each aggregator under its name.
+    """
+    
+    adders = [aggregator['add'] for aggregator in aggregators.values()]
+    for entry in entries:
+        for add in adders:
+            add(entry)
+    return {name: aggregator['result']() for name, aggregator in aggregators.items()}
+
+# An aggregator is a dictionary with two functions sharing some state:
+#   'add'    - called with every entry
+#   'result' - called once at the end to build the report
+
+def security_stats_aggregator():
+    """Aggregator with the same result as analyze_security_log()"""
+    
+    log_stats = {
+        'total_entries': 0,
+        'info_count': 0,
+        'warning_count': 0,
+        'error_count': 0,
+        'critical_count': 0,
+        'users': set(),
+        'suspicious_ips': []
+    }
+    
+    def add(entry):
+        line = entry['line'].strip()
+        if not line:
+            return
+        log_stats['total_entries'] += 1
+        level, users, ip = parse_security_line(line)
+        
+        if level:
+            log_stats[level.lower() + '_count'] += 1
+        log_stats['users'].update(users)
+        if ip is not None:
+            log_stats['suspicious_ips'].append(ip)
+    
+    return {'add': add, 'result': lambda: log_stats}
+
+def line_count_aggregator():
+    """Aggregator with the same result as process_large_log_file()"""
+    
+    counts = {'processed_lines': 0, 'errors': 0, 'warnings': 0}
+    
+    def add(entry):
+        line = entry['line']
+        counts['processed_lines'] += 1
+        if 'ERROR' in line:
+            counts['errors'] += 1
+        elif 'WARNING' in line:
+            counts['warnings'] += 1
+    
+    return {'add': add, 'result': lambda: counts}
+
+def severity_aggregator():
+    """Aggregator that counts the severity of every parsed entry"""
+    
+    counts = {'HIGH': 0, 'LOW': 0, 'invalid': 0}
+    
+    def add(entry):
+        counts[entry.get('severity', 'invalid')] += 1
+    
+    return {'add': add, 'result': lambda: counts}
+
+def collect_aggregator(limit=None):
+    """Aggregator that keeps the entries it sees (the first `limit`)"""
+    
+    collected = []
+    
+    def add(entry):
+        if limit is None or len(collected) < limit:
+            collected.append(entry)
+    
+    return {'add': add, 'result': lambda: collected}
+
+def only_entries(predicate, aggregator):
+    """Let one aggregator see only some entries while the others
+    still see all of them (a filter stage inside the fan-out)"""
+    
+    add = aggregator['add']
+    
+    def filtered_add(entry):
+        if predicate(entry):
+            add(entry)
+    
+    return {'add': filtered_add, 'result': aggregator['result']}
+
+def run_log_pipeline(filename, aggregators, predicate=None):
+    """Read, parse, (filter) and aggregate a log file in one pass"""
+    
+    entries = parse_log_lines(read_log_lines(filename))
+    if predicate is not None:
+        entries = filter_log_entries(entries, predicate)
+    
+    try:
+        return aggregate_log_entries(entries, aggregators)
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found")
+        return None
+
+def is_high_severity(entry):
+    return entry.get('severity') == 'HIGH'
+
+reports = run_log_pipeline(large_log_path, {
+    'security_stats': security_stats_aggregator(),
+    'line_counts': line_count_aggregator(),
+    'severity': severity_aggregator(),
+    'first_high': only_entries(is_high_severity, collect_aggregator(limit=3)),
+})
+
+print("Reports from one pass over the large log:")
+print(f"  line_counts: {reports['line_counts']}")
+print(f"  severity:    {reports['severity']}")
+print(f"  users:       {sorted(reports['security_stats']['users'])}")
+print("  first high severity entries:")
+for entry in reports['first_high']:
+    print(f"    {entry['timestamp']} {entry['level']}: {entry['message']}")
+print()
+
+def three_separate_passes(filename):
+    """What we did before: one function (and one pass) per report"""
+    return (
+        analyze_security_log(filename),
+        process_large_log_file(filename),
+        [parse_log_entry(line) for line in read_log_lines(filename)],
+    )
+
+(separate_stats, separate_counts, _), separate_seconds = time_function(
+    three_separate_passes, large_log_path)
+_, pipeline_seconds = time_function(run_log_pipeline, large_log_path, {
+    'security_stats': security_stats_aggregator(),
+    'line_counts': line_count_aggregator(),
+    'severity': severity_aggregator(),
+})
+
+print(f"Three separate passes: {separate_seconds:.3f} s")
+print(f"One pipeline pass:     {pipeline_seconds:.3f} s")
+print(f"Same results: {separate_stats == reports['security_stats'] and separate_counts == reports['line_counts']}")
+print("(With a warm disk cache the parsing dominates; on a 30 GB file")
+print("that does not fit in memory, reading it once is the big win.)")
+print()
+
+print(run_log_pipeline(current_dir / 'missing_log.txt', {'line_counts': line_count_aggregator()}))
+print()
+
+# Technique 10: Benchmarking with production-sized logs
+print("Technique 10: A repeatable benchmark on a synthetic log")
+print()
+
+import itertools
+import subprocess
+import tempfile
+
+try:
+    import resource  # Not available on Windows
+except ImportError:
+    resource = None
+
+print("Seven sample lines cannot tell us how fast a function is. We")
+print("generate a big log with a realistic mix of levels, users and IPs")
+print("(always the same file for the same seed), measure every log")
+print("function on it and save the numbers as a JSON baseline that the")
+print("next run is compared against.")
+print()
+
+BENCHMARK_LOG_BYTES = 5_000_000  # Use 1_000_000_000 or more for a real baseline
+BENCHMARK_BASELINE_FILE = None   # A path here keeps the baseline between runs
+
+def generate_benchmark_log(filename, target_bytes, seed=7):
+    """Write a synthetic security log of about target_bytes bytes.
+    
+    Levels, users and IPs follow skewed distributions like real logs:
+    mostly INFO, a few very active users and IPs, a long tail of rare
+    ones. Timestamps only move forward.
+    """
+    
+    rng = random.Random(seed)
+    templates = [
+        ('INFO', 'User {user} logged in successfully', 40),
+        ('INFO', 'User {user} accessed secure document', 25),
+        ('INFO', 'Connection from {ip} accepted', 10),
+        ('WARNING', 'Failed login attempt for user {user} from IP: {ip}', 12),
+        ('WARNING', 'Multiple failed attempts detected', 4),
+        ('ERROR', 'Database connection timeout', 6),
+        ('ERROR', 'Firewall blocked {ip}', 2),
+        ('CRITICAL', 'Security breach detected - IP: {ip}', 1),
+    ]
+    users = ['alice', 'bob', 'charlie', 'dave', 'eve', 'mallory'] + [f"user{n:05d}" for n in range(20_000)]
+    ips = [f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}" for n in rng.sample(range(1 << 20), 50_000)]
+    
+    # Zipf-like weights: the item at rank r is picked about 1/r as often
+    user_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(users) + 1)))
+    ip_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(ips) + 1)))
+    template_weights = list(itertools.accumulate(weight for _, _, weight in templates))
+    
+    second = calendar.timegm((2025, 10, 4, 0, 0, 0))
+    written = 0
+    lines = 0
+    batch_size = 10_000
+    
+    with open(filename, 'w') as f:
+        while written < target_bytes:
+            batch = []
+            picked_templates = rng.choices(templates, cum_weights=template_weights, k=batch_size)
+            picked_users = rng.choices(users, cum_weights=user_weights, k=batch_size)
+            picked_ips = rng.choices(ips, cum_weights=ip_weights, k=batch_size)
+            steps = rng.choices((0, 1), weights=(2, 1), k=batch_size)
+            stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(second))
+            
+            for (level, message, _), user, ip, step in zip(picked_templates, picked_users, picked_ips, steps):
+                if step:
+                    second += 1
+                    stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(second))
+                batch.append(f"{stamp} {level} {message.format(user=user, ip=ip)}\n")
+            
+            text = ''.join(batch)
+            f.write(text)
+            written += len(text)
+            lines += batch_size
+    
+    return lines
+
+def run_per_line(function, filename):
+    """Call a function that analyzes one line on every line of a file"""
+    with open(filename, 'r') as f:
+        for line in f:
+            function(line.rstrip('\n'))
+
+def count_lines(filename):
+    with open(filename, 'rb') as f:
+        return sum(block.count(b'\n') for block in iter(lambda: f.read(1024 * 1024), b''))
+
+# The peak RSS of a process never goes down, and a forked child starts
+# with its parent's memory, so a per-function peak needs a fresh Python.
+# This program gets the function's source and runs only that function.
+# On Linux ru_maxrss even keeps the parent's peak across exec, so it
+# reads VmHWM, the peak of its own memory, instead.
+PEAK_RSS_RUNNER = """
+import sys
+source, function_name, takes_file, filename = sys.argv[1:]
+namespace = {}
+exec(source, namespace)
+if function_name:
+    function = namespace[function_name]
+    if takes_file == 'True':
+        function(filename)
+    else:
+        with open(filename, 'r') as f:
+            for line in f:
+                function(line.rstrip('\\n'))
+try:
+    with open('/proc/self/status') as f:
+        peak = next(int(line.split()[1]) * 1024 for line in f if line.startswith('VmHWM:'))
+except (OSError, StopIteration):
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = peak if sys.platform == 'darwin' else peak * 1024  # KiB except on macOS
+print(peak)
+"""
+
+def fresh_process_peak_rss(filename, source='', function_name='', takes_file=True):
+    """Peak resident memory of a new Python process that runs only one
+    function on filename (no function: an idle interpreter), or None"""
+    
+    if resource is None:
+        return None
+    finished = subprocess.run(
+        [sys.executable, '-c', PEAK_RSS_RUNNER, source, function_name, str(takes_file), str(filename)],
+        capture_output=True, text=True, check=True)
+    return int(finished.stdout)
+
+# name -> (file it comes from, function name, does it take a whole file?, helpers it needs)
+BENCHMARKS = {
+    'analyze_security_log': ('009_files_explained.py', 'analyze_security_log', True,
+                             ('parse_security_line', 'SECURITY_LEVELS')),
+    'process_large_log_file': ('009_files_explained.py', 'process_large_log_file', True, ()),
+    'analyze_log_entry': ('008_functions_exceptions_and_files_explained.py', 'analyze_log_entry', False, ()),
+    'process_security_log': ('013_documentation_and_debugging_explained.py', 'process_security_log', False, ()),
+}
+
+def run_one_benchmark(name, filename, allocation_lines=50_000):
+    """Measure the speed, peak RSS and Python allocations of one function"""
+    
+    source_file, function_name, takes_file, helpers = BENCHMARKS[name]
+    source = course_function_source(source_file, function_name, helpers)
+    namespace = {}
+    exec(compile(source, source_file, 'exec'), namespace)
+    function = namespace[function_name]
+    
+    def run(path):
+        return function(path) if takes_file else run_per_line(function, path)
+    
+    _, seconds = time_function(run, filename)
+    rss = fresh_process_peak_rss(filename, source, function_name, takes_file)
+    
+    # tracemalloc slows everything down, so measure allocations on a
+    # separate, smaller run over the first lines only
+    sample_path = f"{filename}.sample"
+    with open(filename, 'r') as log, open(sample_path, 'w') as sample:
+        sample.writelines(itertools.islice(log, allocation_lines))
+    tracemalloc.start()
+    run(sample_path)
+    _, peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    os.remove(sample_path)
+    
+    return {'seconds': seconds, 'peak_rss_bytes': rss,
+            'peak_traced_bytes': peak_traced, 'traced_lines': allocation_lines}
+
+def run_log_benchmarks(filename, baseline_file, names=None):
+    """Benchmark the log functions on a file and save a JSON baseline.
+    
+    Returns (results, previous results or None).
+    """
+    
+    lines = count_lines(filename)
+    results = {
+        'log_file': str(filename),
+        'log_bytes': os.path.getsize(filename),
+        'log_lines': lines,
+        'python': sys.version.split()[0],
+        'idle_rss_bytes': fresh_process_peak_rss(filename),
+        'functions': {},
+    }
+    
+    for name in names or BENCHMARKS:
+        measured = run_one_benchmark(name, filename)
+        measured['lines_per_second'] = round(lines / measured['seconds'])
+        results['functions'][name] = measured
+    
+    previous = None
+    if os.path.exists(baseline_file):
+        with open(baseline_file, 'r') as f:
+            previous = json.load(f)
+    
+    with open(baseline_file, 'w') as f:
+        json.dump(results, f, indent=2)
+    
+    return results, previous
+
+def print_benchmark_report(results, previous=None):
+    """Print the benchmark results, with the change from a previous run"""
+    
+    for name, measured in results['functions'].items():
+        rss = measured['peak_rss_bytes']
+        rss_text = f"{rss / 1_000_000:7.1f} MB RSS" if rss is not None else "  RSS n/a"
+        line = (f"  {name:24} {measured['lines_per_second']:>10,} lines/s  {rss_text}  "
+                f"{measured['peak_traced_bytes'] / 1024:8.0f} KiB traced")
+        
+        old = previous['functions'].get(name) if previous else None
+        if old:
+            change = measured['lines_per_second'] / old['lines_per_second'] - 1
+            line += f"  ({change:+.1%} vs baseline)"
+        print(line)
+
+# The generated log (and the baseline, unless BENCHMARK_BASELINE_FILE
+# is set) go to a temporary directory that is deleted at the end
+benchmark_dir = Path(tempfile.mkdtemp(prefix='log_benchmark_'))
+benchmark_log_path = benchmark_dir / 'benchmark_security_log.txt'
+if BENCHMARK_BASELINE_FILE:
+    benchmark_baseline_path = Path(BENCHMARK_BASELINE_FILE)
+else:
+    benchmark_baseline_path = benchmark_dir / 'log_benchmark_baseline.json'
+
+benchmark_lines, generate_seconds = time_function(
+    generate_benchmark_log, benchmark_log_path, BENCHMARK_LOG_BYTES)
+print(f"Generated {benchmark_log_path.name}: {benchmark_lines:,} lines, "
+      f"{benchmark_log_path.stat().st_size / 1_000_000:.0f} MB in {generate_seconds:.1f} s")
+
+with open(benchmark_log_path, 'r') as f:
+    for line in itertools.islice(f, 3):
+        print(f"  {line.rstrip()}")
+print()
+
+benchmark_results, previous_results = run_log_benchmarks(benchmark_log_path, benchmark_baseline_path)
+print(f"Benchmark ({benchmark_results['log_lines']:,} lines, saved to {benchmark_baseline_path.name}):")
+print_benchmark_report(benchmark_results, previous_results)
+idle_rss = benchmark_results['idle_rss_bytes']
+if idle_rss is not None:
+    print("(RSS: peak memory of a fresh Python that runs only that function;")
+    print(f" an idle interpreter alone uses {idle_rss / 1_000_000:.1f} MB.)")
+print("(KiB traced: peak Python allocations while processing the first")
+print(" 50,000 lines, measured with tracemalloc.)")
+print("Set BENCHMARK_BASELINE_FILE to compare the next run against this one.")
+print()
+
+# Technique 11: An inverted index for fast lookups
+print("Technique 11: Finding lines by IP, user or level with an index")
+print()
+
+print("'Which lines mention 192.168.1.100?' normally means reading every")
+print("archive again. An inverted index (like the one at the back of a")
+print("book) maps every token to where it appears:")
+print("  ip:192.168.1.100 -> [(file, offset), (file, offset), ...]")
+print("so a lookup reads only the matching lines. The index is updated")
+print("incrementally: each run only indexes bytes appended since the last.")
+print()
+
+IPV4_PATTERN = re.compile(rb'(?<![\d.])(?:\d{1,3}\.){3}\d{1,3}(?![\d.])')
+INDEX_FLUSH_POSTINGS = 200_000  # Postings kept in memory (about 16 MB) before a segment is written
+INDEX_MERGE_FACTOR = 4  # Merge this many segments of about the same size
+
+def log_line_tokens(line):
+    """Return the index tokens of one log line (bytes, no newline)"""
+    
+    tokens = set()
+    words = line.split()
+    if len(words) >= 3:
+        tokens.add(b'level:' + words[2])
+    for i, word in enumerate(words[:-1]):
+        if word.lower() == b'user':
+            tokens.add(b'user:' + words[i + 1])
+    for ip in IPV4_PATTERN.findall(line):
+        tokens.add(b'ip:' + ip)
+    return tokens
+
+def write_postings(f, postings):
+    """Write sorted (file id, offset) pairs to f in compressed form.
+    
+    Offsets are stored as the gap to the previous offset in the same
+    file, and every number as a varint (7 bits per byte), so most
+    postings take 2-3 bytes instead of two 8-byte integers. postings
+    can be any iterator; it is written 64 KB at a time. Returns
+    (bytes written, number of postings).
+    """
+    
+    encoded = bytearray()
+    written = count = 0
+    previous_file, previous_offset = 0, 0
+    for file_id, offset in postings:
+        if file_id != previous_file:
+            previous_offset = 0
+        for number in (file_id - previous_file, offset - previous_offset):
+            while number >= 0x80:
+                encoded.append(number & 0x7F | 0x80)
+                number >>= 7
+            encoded.append(number)
+        previous_file, previous_offset = file_id, offset
+        count += 1
+        
+        if len(encoded) >= 64 * 1024:
+            f.write(encoded)
+            written += len(encoded)
+            encoded.clear()
+    
+    f.write(encoded)
+    return written + len(encoded), count
+
+def iter_postings(f, start, length, chunk_size=64 * 1024):
+    """Yield the (file id, offset) pairs that write_postings stored in
+    bytes [start, start + length) of f, reading a chunk at a time"""
+    
+    f.seek(start)
+    remaining = length
+    file_id, offset = 0, 0
+    number = shift = 0
+    file_gap = None  # First number of a pair, waiting for the second
+    
+    while remaining > 0:
+        data = f.read(min(chunk_size, remaining))
+        if not data:
+            break
+        remaining -= len(data)
+        
+        for byte in data:
+            number |= (byte & 0x7F) << shift
+            if byte & 0x80:
+                shift += 7
+                continue
+            if file_gap is None:
+                file_gap = number
+            else:
+                if file_gap:
+                    file_id += file_gap
+                    offset = 0
+                offset += number
+                yield file_id, offset
+                file_gap = None
+            number = shift = 0
+
+def write_json_atomically(filename, data):
+    """Write JSON through a temporary file, like save_checkpoint()"""
+    temp_file = Path(str(filename) + '.tmp')
+    with open(temp_file, 'w') as f:
+        json.dump(data, f)
+    os.replace(temp_file, filename)
+
+def write_index_segment(index_dir, manifest, postings_by_token):
+    """Write the postings collected in memory as a new segment: a
+    postings file and its term dictionary, in sorted token order"""
+    
+    name = f"segment_{manifest['next_segment']:06d}"
+    manifest['next_segment'] += 1
+    terms = {}
+    total = 0
+    with open(index_dir / f"{name}.postings", 'wb') as f:
+        for token in sorted(postings_by_token):
+            start = f.tell()
+            length, count = write_postings(f, sorted(postings_by_token[token]))
+            terms[token.decode(errors='replace')] = [start, length, count]
+            total += count
+    write_json_atomically(index_dir / f"{name}.terms", terms)
+    manifest['segments'].append({'name': name, 'postings': total})
+
+def load_index_manifest(index_dir):
+    """Load the list of indexed files and segments, or start a new one"""
+    try:
+        with open(index_dir / 'manifest.json', 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'files': {}, 'next_file_id': 1, 'segments': [], 'next_segment': 1}
+
+def indexed_part_is_unchanged(file_state, filename):
+    """Same checks as load_checkpoint(): not rotated, truncated or rewritten"""
+    
+    file_info = os.stat(filename)
+    return ((file_state['inode'], file_state['device']) == (file_info.st_ino, file_info.st_dev)
+            and file_info.st_size >= file_state['offset']
+            and read_fingerprint(filename, file_state['offset']) == file_state['fingerprint'])
+
+def update_log_index(index_dir, filenames):
+    """Index the lines appended to each file since the last update.
+    
+    Returns the number of new lines indexed. New postings are written
+    as a segment whenever INDEX_FLUSH_POSTINGS of them are in memory,
+    so memory stays bounded however much new data there is. Segments
+    of about the same size are merged as they pile up.
+    """
+    
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_index_manifest(index_dir)
+    postings_by_token = {}
+    pending_postings = 0
+    new_lines = 0
+    
+    for filename in filenames:
+        filename = str(filename)
+        if not os.path.exists(filename):
+            print(f"Error: File '{filename}' not found")
+            continue
+        
+        file_state = manifest['files'].get(filename)
+        if file_state is None or not indexed_part_is_unchanged(file_state, filename):
+            # New or replaced file: a new id, so postings pointing into
+            # the old contents are ignored from now on
+            file_state = {'id': manifest['next_file_id'], 'offset': 0}
+            manifest['next_file_id'] += 1
+        
+        file_id = file_state['id']
+        offset = file_state['offset']
+        end = end_of_complete_lines(filename, offset)
+        
+        for block in iter_line_blocks(filename, offset, end):
+            for line in block.split(b'\n')[:-1]:
+                tokens = log_line_tokens(line)
+                for token in tokens:
+                    postings_by_token.setdefault(token, []).append((file_id, offset))
+                offset += len(line) + 1
+                new_lines += 1
+                
+                pending_postings += len(tokens)
+                if pending_postings >= INDEX_FLUSH_POSTINGS:
+                    write_index_segment(index_dir, manifest, postings_by_token)
+                    postings_by_token = {}
+                    pending_postings = 0
+        
+        file_info = os.stat(filename)
+        manifest['files'][filename] = {
+            'id': file_id,
+            'offset': end,
+            'inode': file_info.st_ino,
+            'device': file_info.st_dev,
+            'fingerprint': read_fingerprint(filename, end),
+        }
+    
+    if postings_by_token:
+        write_index_segment(index_dir, manifest, postings_by_token)
+    
+    old_segments = []
+    while True:
+        group = segments_to_merge(manifest['segments'])
+        if not group:
+            break
+        merge_index_segments(index_dir, manifest, group)
+        old_segments.extend(segment['name'] for segment in group)
+    
+    # The manifest is written last: until then the old index stays valid
+    write_json_atomically(index_dir / 'manifest.json', manifest)
+    for name in old_segments:
+        os.remove(index_dir / f"{name}.terms")
+        os.remove(index_dir / f"{name}.postings")
+    return new_lines
+
+def live_file_ids(manifest):
+    """Map the id of every file still in the index to its name"""
+    return {state['id']: filename for filename, state in manifest['files'].items()}
+
+def segments_to_merge(segments):
+    """Pick INDEX_MERGE_FACTOR segments of about the same size, or [].
+    
+    Sizes are grouped by powers of INDEX_MERGE_FACTOR, so every posting
+    is rewritten only about log(total / INDEX_FLUSH_POSTINGS) times.
+    """
+    
+    tiers = {}
+    for segment in segments:
+        tier = int(math.log(max(segment['postings'], 1), INDEX_MERGE_FACTOR))
+        tiers.setdefault(tier, []).append(segment)
+    for tier in sorted(tiers):
+        if len(tiers[tier]) >= INDEX_MERGE_FACTOR:
+            return tiers[tier][:INDEX_MERGE_FACTOR]
+    return []
+
+def merge_index_segments(index_dir, manifest, group):
+    """Merge the segments in group into one new segment, dropping the
+    postings of replaced files.
+    
+    The term lists of the segments are sorted, so a k-way merge visits
+    every token once, and the postings of that token are merged as
+    they are read: only a few KB per segment are in memory at a time.
+    The old segment files can be deleted once the manifest is saved.
+    """
+    
+    live = live_file_ids(manifest)
+    sources = []
+    for segment in group:
+        with open(index_dir / f"{segment['name']}.terms", 'r') as f:
+            terms = json.load(f)
+        sources.append((open(index_dir / f"{segment['name']}.postings", 'rb'), terms))
+    
+    name = f"segment_{manifest['next_segment']:06d}"
+    manifest['next_segment'] += 1
+    merged_terms = {}
+    total = 0
+    try:
+        token_lists = [zip(sorted(terms), itertools.repeat(number))
+                       for number, (_, terms) in enumerate(sources)]
+        with open(index_dir / f"{name}.postings", 'wb') as out:
+            for token, found_in in itertools.groupby(heapq.merge(*token_lists), key=lambda pair: pair[0]):
+                streams = []
+                for _, number in found_in:
+                    postings_file, terms = sources[number]
+                    start, length, _ = terms[token]
+                    streams.append(iter_postings(postings_file, start, length))
+                
+                start = out.tell()
+                length, count = write_postings(
+                    out, (posting for posting in heapq.merge(*streams) if posting[0] in live))
+                if count:
+                    merged_terms[token] = [start, length, count]
+                    total += count
+    finally:
+        for postings_file, _ in sources:
+            postings_file.close()
+    
+    write_json_atomically(index_dir / f"{name}.terms", merged_terms)
+    manifest['segments'] = [segment for segment in manifest['segments'] if segment not in group]
+    manifest['segments'].append({'name': name, 'postings': total})
+
+def open_log_index(index_dir):
+    """Load the manifest and term dictionaries (the postings stay on disk)"""
+    
+    index_dir = Path(index_dir)
+    manifest = load_index_manifest(index_dir)
+    segments = []
+    for segment in manifest['segments']:
+        with open(index_dir / f"{segment['name']}.terms", 'r') as f:
+            segments.append((index_dir / f"{segment['name']}.postings", json.load(f)))
+    return {'manifest': manifest, 'segments': segments, 'live_files': live_file_ids(manifest)}
+
+def lookup_log_index(index, token):
+    """Return (filename, offset) of every line with token, in file order"""
+    
+    found = []
+    for postings_file, terms in index['segments']:
+        entry = terms.get(token)
+        if entry is None:
+            continue
+        start, length, _ = entry
+        with open(postings_file, 'rb') as f:
+            found.extend(iter_postings(f, start, length))
+    
+    live = index['live_files']
+    return [(live[file_id], offset) for file_id, offset in sorted(set(found)) if file_id in live]
+
+def read_indexed_lines(index, token, limit=None):
+    """Read only the lines that contain token"""
+    
+    lines = []
+    open_files = {}
+    try:
+        for filename, offset in lookup_log_index(index, token)[:limit]:
+            if filename not in open_files:
+                open_files[filename] = open(filename, 'rb')
+            f = open_files[filename]
+            f.seek(offset)
+            lines.append(f.readline().decode(errors='replace').rstrip('\r\n'))
+    finally:
+        for f in open_files.values():
+            f.close()
+    return lines
+
+index_dir = cache_dir / 'log_index'
+shutil.rmtree(index_dir, ignore_errors=True)
+growing_log_path = logs_dir / 'growing_security_log.txt'
+shutil.copyfile(log_files_path, growing_log_path)
+
+indexed_lines, index_seconds = time_function(update_log_index, index_dir, [large_log_path, growing_log_path])
+index_bytes = sum(path.stat().st_size for path in index_dir.iterdir())
+print(f"Indexed {indexed_lines:,} lines in {index_seconds:.2f} s "
+      f"(index: {index_bytes / 1_000_000:.1f} MB, logs: {large_log_path.stat().st_size / 1_000_000:.1f} MB)")
+
+# Only the appended line is indexed by the next update
+with open(growing_log_path, 'a') as f:
+    f.write("2025-10-04 10:40:00 WARNING Failed login attempt for user mallory - IP: 192.168.1.100\n")
+new_lines = update_log_index(index_dir, [large_log_path, growing_log_path])
+print(f"After appending one line, the next update indexed {new_lines} line(s)")
+
+log_index = open_log_index(index_dir)
+ip_hits, lookup_seconds = time_function(lookup_log_index, log_index, 'ip:192.168.1.100')
+print(f"ip:192.168.1.100 is on {len(ip_hits)} lines (lookup took {lookup_seconds * 1000:.2f} ms)")
+print("Lines for user:mallory (first 3):")
+for line in read_indexed_lines(log_index, 'user:mallory', limit=3):
+    print(f"  {line}")
+
+_, scan_seconds = time_function(
+    lambda: [line for line in read_log_lines(large_log_path) if '192.168.1.100' in line])
+print(f"Answering the IP question by scanning the log instead: {scan_seconds * 1000:.0f} ms")
+shutil.rmtree(index_dir)
+growing_log_path.unlink()
+print()
+
+# Technique 12: Jumping to a time window
+print("Technique 12: Binary search for a time range")
+print()
+
+print("Log lines are written in time order, so the file is sorted by")
+print("timestamp. To read 05:00-05:05 we do not have to start at the")
+print("top: jump to the middle of the file, read the timestamp of the")
+print("next whole line and keep halving the range, like looking up a")
+print("word in a dictionary. Only a few KB are read to find the start.")
+print()
+
+def line_timestamp(line, day_cache):
+    """Seconds since 1970 for a raw log line, or NO_TIMESTAMP.
+    
+    Works for 'DATE TIME LEVEL ...' lines and for the 'DATE LEVEL ...'
+    lines analyze_log_entry() reads (those count as midnight).
+    """
+    
+    return parse_log_timestamp(line[:19].decode('ascii', errors='replace'), day_cache)
+
+def next_timestamped_line(f, position, day_cache, max_lines=100):
+    """Return (offset, timestamp) of the first dated line starting at or
+    after position, or (file size, None) if there is none nearby"""
+    
+    f.seek(max(0, position - 1))
+    if position > 0:
+        f.readline()  # Skip the rest of the line we landed in
+    
+    for _ in range(max_lines):
+        offset = f.tell()
+        line = f.readline()
+        if not line:
+            break
+        timestamp = line_timestamp(line, day_cache)
+        if timestamp != NO_TIMESTAMP:
+            return offset, timestamp
+    return f.seek(0, os.SEEK_END), None
+
+def seek_log_time(f, start_time, day_cache, scan_size=64 * 1024):
+    """Return the offset of the first line with timestamp >= start_time"""
+    
+    low = 0                           # A line start before the answer
+    high = f.seek(0, os.SEEK_END)     # At or after the answer
+    
+    while high - low > scan_size:
+        middle = (low + high) // 2
+        offset, timestamp = next_timestamped_line(f, middle, day_cache)
+        if timestamp is not None and timestamp < start_time and offset < high:
+            low = offset
+        else:
+            high = middle
+    
+    # The answer is within scan_size bytes: finish with a short scan
+    f.seek(low)
+    while True:
+        offset = f.tell()
+        line = f.readline()
+        if not line:
+            return offset
+        timestamp = line_timestamp(line, day_cache)
+        if timestamp != NO_TIMESTAMP and timestamp >= start_time:
+            return offset
+
+def read_log_time_range(filename, start_time, end_time):
+    """Yield the lines with start_time <= timestamp < end_time.
+    
+    Times are 'YYYY-MM-DD HH:MM:SS' strings (UTC). The file must be in
+    time order; lines without a timestamp belong to the line before.
+    """
+    
+    day_cache = [None, 0]
+    start = parse_log_timestamp(start_time, day_cache)
+    end = parse_log_timestamp(end_time, day_cache)
+    
+    with open(filename, 'rb') as f:
+        f.seek(seek_log_time(f, start, day_cache))
+        for line in f:
+            timestamp = line_timestamp(line, day_cache)
+            if timestamp != NO_TIMESTAMP and timestamp >= end:
+                break
+            yield line.decode(errors='replace').rstrip('\r\n')
+
+def bytes_read_so_far():
+    """Bytes this process has read from files so far (Linux only), or None"""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            for line in f:
+                if line.startswith('rchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+def scan_log_time_range(filename, start_time, end_time):
+    """The slow way: read the whole file and compare every timestamp"""
+    
+    day_cache = [None, 0]
+    start = parse_log_timestamp(start_time, day_cache)
+    end = parse_log_timestamp(end_time, day_cache)
+    with open(filename, 'rb') as f:
+        return [line.decode(errors='replace').rstrip('\r\n') for line in f
+                if start <= line_timestamp(line, day_cache) < end]
+
+window = ('2025-10-04 05:00:00', '2025-10-04 05:05:00')
+read_before = bytes_read_so_far()
+window_lines, seek_seconds = time_function(lambda: list(read_log_time_range(benchmark_log_path, *window)))
+read_after = bytes_read_so_far()
+
+print(f"Lines from {window[0]} to {window[1]} in {benchmark_log_path.name}:")
+print(f"  {len(window_lines):,} lines, first: {window_lines[0]}")
+print(f"  last:  {window_lines[-1]}")
+print(f"  Binary search + read: {seek_seconds * 1000:.1f} ms", end='')
+if read_before is not None:
+    print(f", {(read_after - read_before) / 1024:.0f} KB read of "
+          f"{benchmark_log_path.stat().st_size / 1024:,.0f} KB")
+else:
+    print()
+
+scanned_lines, scan_seconds = time_function(scan_log_time_range, benchmark_log_path, *window)
+print(f"  Full scan:            {scan_seconds * 1000:.1f} ms, same lines: {scanned_lines == window_lines}")
+print()
+
+# Technique 13: Merging logs from many hosts in time order
+print("Technique 13: A k-way merge of sorted log files")
+print()
+
+print("Every host (and every rotated file) is sorted by time on its own.")
+print("To see events in global time order we read all files at once and")
+print("always output the earliest line at the front of any file. A heap")
+print("finds that line in O(log k) steps for k files, and only one line")
+print("plus a small read buffer per file is kept in memory.")
+print()
+
+def iter_timestamped_lines(filename, source, buffer_size, day_cache):
+    """Yield (timestamp, source, line) for one sorted log file.
+    
+    Lines without a timestamp (e.g. a stack trace) get the timestamp of
+    the line before, so they stay right after it.
+    """
+    
+    timestamp = NO_TIMESTAMP
+    with open(filename, 'rb', buffering=buffer_size) as f:
+        for line in f:
+            line_time = line_timestamp(line, day_cache)
+            if line_time != NO_TIMESTAMP:
+                timestamp = line_time
+            yield timestamp, source, line.decode(errors='replace').rstrip('\r\n')
+
+def merge_log_files(filenames, buffer_size=64 * 1024):
+    """Yield (filename, line) from several sorted logs in time order.
+    
+    Lines with the same timestamp come out in the order of filenames.
+    Memory use is about buffer_size per file, however big the files are.
+    """
+    
+    day_cache = [None, 0]
+    streams = [iter_timestamped_lines(filename, str(filename), buffer_size, day_cache)
+               for filename in filenames]
+    
+    # heapq.merge keeps a heap with the next line of every stream
+    for _, source, line in heapq.merge(*streams, key=lambda item: item[0]):
+        yield source, line
+
+# Spread the benchmark log over three "hosts"; each file stays sorted
+rng = random.Random(1)
+host_paths = [logs_dir / f"host{number}_security_log.txt" for number in range(1, 4)]
+host_files = [open(path, 'w') for path in host_paths]
+with open(benchmark_log_path, 'r') as f:
+    for line in f:
+        rng.choice(host_files).write(line)
+for host_file in host_files:
+    host_file.close()
+
+print("Merging 3 host logs:")
+for source, line in itertools.islice(merge_log_files(host_paths), 4):
+    print(f"  {Path(source).name:24} {line}")
+
+def check_merge(filenames, limit=None):
+    """Merge the files (only the first `limit` lines if given) and check
+    that time never goes backwards"""
+    
+    day_cache = [None, 0]
+    previous = NO_TIMESTAMP
+    merged_lines = 0
+    in_order = True
+    for _, line in itertools.islice(merge_log_files(filenames), limit):
+        timestamp = line_timestamp(line.encode(), day_cache)
+        in_order = in_order and timestamp >= previous
+        previous = timestamp
+        merged_lines += 1
+    return merged_lines, in_order
+
+(merged_lines, in_order), merge_seconds = time_function(check_merge, host_paths)
+print(f"  {merged_lines:,} lines merged in {merge_seconds:.1f} s, in time order: {in_order}")
+
+# tracemalloc makes the merge several times slower, so memory is only
+# measured on the first lines: if it stays flat, the merge does not grow
+for prefix_lines in (5_000, 20_000):
+    tracemalloc.start()
+    check_merge(host_paths, prefix_lines)
+    _, merge_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  Peak Python memory for the first {prefix_lines:,} lines: {merge_peak / 1024:.0f} KB")
+print(f"  (the files are {sum(path.stat().st_size for path in host_paths) / 1_000_000:.0f} MB)")
+print()
+
+# Technique 14: Spotting brute-force attacks while reading
+print("Technique 14: Sliding windows of failed logins")
+print()
+
+from collections import OrderedDict
+
+print("'5 failed logins for the same user within 60 seconds' is a")
+print("brute-force attack. For every user and every IP we keep the times")
+print("of its last failures in a small tuple. Old times fall out of the")
+print("window, and a key that has been quiet for a whole window is")
+print("forgotten, so memory depends on how many keys are active right now.")
+print()
+
+FAILED_LOGIN = re.compile(rb'Failed login attempt for user (\S+)([^\n]*)')
+
+def new_failure_window(window_seconds=60, threshold=5, max_keys=100_000):
+    """Create a tracker that alerts on `threshold` failures of one key
+    within `window_seconds`, remembering at most `max_keys` keys.
+    
+    A tracked key costs about 200-400 bytes (its dictionary entry, the
+    key and a tuple of up to `threshold` times): up to about 40 MB for
+    the default limit, 400 MB for a million keys. Keys beyond `max_keys`
+    push out the least recently seen ones, whose bursts are then missed.
+    """
+    if max_keys < 1 or threshold < 1 or window_seconds < 0:
+        raise ValueError("max_keys and threshold must be at least 1, window_seconds at least 0")
+    return {
+        'window': window_seconds,
+        'threshold': threshold,
+        'max_keys': max_keys,
+        'keys': OrderedDict(),  # key -> tuple of failure times, oldest key first
+    }
+
+def window_add_failure(tracker, key, timestamp):
+    """Record one failure; return True if it completes a burst.
+    
+    Only the last `threshold` times of a key are needed to know if they
+    all fit in the window, so a key never keeps more than that. A tuple
+    of a few times is several times smaller than a deque.
+    Timestamps must not go backwards.
+    """
+    
+    keys = tracker['keys']
+    threshold = tracker['threshold']
+    
+    # pop() and re-insert: the most recently failed keys live at the end
+    times = keys.pop(key, None)
+    if times is None:
+        times = (timestamp,)
+    elif len(times) < threshold:
+        times += (timestamp,)
+    else:
+        times = times[1:] + (timestamp,)
+    keys[key] = times
+    
+    # Forget keys whose last failure left the window, and the least
+    # recently seen keys if there are still too many
+    oldest_allowed = timestamp - tracker['window']
+    max_keys = tracker['max_keys']
+    while True:
+        oldest_key = next(iter(keys))
+        if keys[oldest_key][-1] >= oldest_allowed and len(keys) <= max_keys:
+            break
+        del keys[oldest_key]
+    
+    if len(times) == threshold and timestamp - times[0] <= tracker['window']:
+        del keys[key]  # Start counting again, so a long attack alerts once per burst
+        return True
+    return False
+
+def iter_brute_force_alerts(filename, window_seconds=60, threshold=5, max_keys=100_000):
+    """Yield an alert dictionary for every burst of failed logins per
+    user and per IP in a log file.
+    
+    Keeps two trackers (users and IPs) of up to `max_keys` keys each.
+    The Python work per failed login keeps the speed below a million
+    log lines per second (0.5-0.7 million on a laptop core when one line
+    in eight is a failure).
+    """
+    
+    users = new_failure_window(window_seconds, threshold, max_keys)
+    ips = new_failure_window(window_seconds, threshold, max_keys)
+    day_cache = [None, 0]
+    
+    # finditer() jumps from one failed login to the next in C, so the
+    # other lines cost no Python code at all
+    for block in iter_line_blocks(filename, 0, os.path.getsize(filename)):
+        for match in FAILED_LOGIN.finditer(block):
+            line_start = block.rfind(b'\n', 0, match.start()) + 1
+            stamp = block[line_start:line_start + 19].decode(errors='replace')
+            timestamp = parse_log_timestamp(stamp, day_cache)
+            if timestamp == NO_TIMESTAMP:
+                continue
+            user = match.group(1).decode(errors='replace')
+            
+            if window_add_failure(users, user, timestamp):
+                yield {'time': stamp, 'kind': 'user', 'key': user, 'failures': threshold}
+            
+            ip = IPV4_PATTERN.search(match.group(2))
+            if ip and window_add_failure(ips, ip.group().decode(), timestamp):
+                yield {'time': stamp, 'kind': 'ip', 'key': ip.group().decode(), 'failures': threshold}
+
+def failure_window_bytes_per_key(key_count, failures_per_key):
+    """Traced bytes per key of a tracker with key_count different IPs.
+    
+    A function, not a loop at the top of the file: tracemalloc records
+    the line of every allocation, which is very slow at module level in
+    a file this long.
+    """
+    
+    tracker = new_failure_window(window_seconds=60, threshold=failures_per_key + 1, max_keys=key_count)
+    start_time = calendar.timegm((2025, 10, 4, 0, 0, 0))
+    tracemalloc.start()
+    for failure in range(failures_per_key):
+        for number in range(key_count):
+            ip = f"10.{number >> 16 & 255}.{number >> 8 & 255}.{number & 255}"
+            window_add_failure(tracker, ip, start_time + failure)
+    tracker_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tracker_bytes / len(tracker['keys'])
+
+alerts, detect_seconds = time_function(lambda: list(iter_brute_force_alerts(benchmark_log_path)))
+benchmark_line_count = benchmark_results['log_lines']
+print(f"Brute-force alerts in {benchmark_log_path.name} "
+      f"(5 failures in 60 s, {benchmark_line_count / detect_seconds:,.0f} lines/s):")
+for alert in alerts[:4]:
+    print(f"  {alert['time']} {alert['kind']:4} {alert['key']}")
+print(f"  ... {len(alerts)} alerts in total")
+print()
+
+# Memory per tracked key, measured on 20,000 keys and multiplied
+for failures in (1, 4):
+    bytes_per_key = failure_window_bytes_per_key(20_000, failures)
+    print(f"Memory per key with {failures} failure time(s): about {bytes_per_key:,.0f} bytes, "
+          f"{bytes_per_key * 1_000_000 / 1_000_000:,.0f} MB for a million keys")
+
+# Many different attackers: the window forgets quiet keys
+tracker = new_failure_window(window_seconds=60, threshold=5)
+start = time.perf_counter()
+for number in range(300_000):
+    window_add_failure(tracker, number, number // 1000)  # 1000 new IPs per second
+add_seconds = time.perf_counter() - start
+print(f"300,000 different keys at 1,000 per second: {len(tracker['keys']):,} still tracked "
+      f"(the last 60 s), {300_000 / add_seconds:,.0f} failures per second")
+print()
+
+# Technique 15: Estimating from a sample
+print("Technique 15: Sampling random blocks with confidence intervals")
+print()
+
+from statistics import NormalDist
+
+print("For a quick health check of a 100 GB archive ('about how many")
+print("errors?') reading everything is overkill. We read a random 2% of")
+print("fixed-size blocks, count those exactly and scale up. The spread")
+print("between blocks tells us how far off the estimate may be.")
+print()
+
+def count_sampled_block(f, start, block_size):
+    """Count the lines that start inside [start, start + block_size)"""
+    
+    counts = {'processed_lines': 0, 'errors': 0, 'warnings': 0}
+    if start > 0:
+        f.seek(start - 1)
+        f.readline()  # Skip the line that began in the previous block
+    else:
+        f.seek(0)
+    
+    position = f.tell()
+    if position >= start + block_size:
+        return counts  # The whole block is one line that began earlier
+    
+    lines = f.read(start + block_size - position)
+    if lines and not lines.endswith(b'\n'):
+        lines += f.readline()  # Finish the last line that starts here
+    if lines:
+        count_log_block(lines, counts)
+    return counts
+
+def process_large_log_file_sampled(filename, sample_rate=0.02, block_size=64 * 1024,
+                                   seed=None, confidence=0.95):
+    """Estimate the result of process_large_log_file from random blocks.
+    
+    Returns the estimated counts plus a (low, high) confidence interval
+    for each of them. With sample_rate=1 the counts are exact.
+    """
+    
+    try:
+        file_size = os.path.getsize(filename)
+    except FileNotFoundError:
+        return None
+    
+    total_blocks = max(1, -(-file_size // block_size))  # Round up
+    sample_size = min(total_blocks, max(2, round(total_blocks * sample_rate)))
+    starts = sorted(random.Random(seed).sample(range(total_blocks), sample_size))
+    
+    samples = []
+    with open(filename, 'rb') as f:
+        for block_number in starts:  # Sorted, so the disk reads move forward
+            samples.append(count_sampled_block(f, block_number * block_size, block_size))
+    
+    # Scale the sample up to the whole file. The standard error uses the
+    # spread of the per-block counts, corrected for sampling without
+    # replacement from a finite number of blocks.
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    scale = total_blocks / sample_size
+    correction = 1 - sample_size / total_blocks
+    
+    result = {'sampled_blocks': sample_size, 'total_blocks': total_blocks, 'intervals': {}}
+    for key in ('processed_lines', 'errors', 'warnings'):
+        values = [sample[key] for sample in samples]
+        mean = sum(values) / sample_size
+        variance = sum((value - mean) ** 2 for value in values) / max(1, sample_size - 1)
+        error = z * total_blocks * math.sqrt(correction * variance / sample_size)
+        estimate = sum(values) * scale
+        result[key] = round(estimate)
+        result['intervals'][key] = (max(0, round(estimate - error)), round(estimate + error))
+    return result
+
+exact_counts, exact_seconds = time_function(process_large_log_file, large_log_path)
+sampled_counts, sampled_seconds = time_function(
+    process_large_log_file_sampled, large_log_path, sample_rate=0.02, block_size=16 * 1024, seed=1)
+
+print(f"Exact ({exact_seconds * 1000:.0f} ms): {exact_counts}")
+print(f"2% sample of {sampled_counts['total_blocks']} blocks ({sampled_seconds * 1000:.0f} ms):")
+for key in ('processed_lines', 'errors', 'warnings'):
+    low, high = sampled_counts['intervals'][key]
+    print(f"  {key:16} ~{sampled_counts[key]:>7,}  95% interval {low:,} - {high:,}")
+print()
+
+# Technique 16: Watching a directory for new log data
+print("Technique 16: A low-overhead watch mode")
+print()
+
+import fnmatch
+from urllib.parse import quote
+
+print("Instead of a cron job that re-reads everything, we can watch the")
+print("log directory. One os.scandir() pass gets the size and modification")
+print("time of every file; only files that grew (or are new) are handed")
+print("to process_file_batch, and the checkpoint functions from technique")
+print("3 make sure only the appended bytes are read. While nothing")
+print("changes we sleep longer and longer, so an idle watcher costs")
+print("almost no CPU.")
+print()
+
+def scan_log_directory(directory, known_files, pattern='*.txt'):
+    """Return the files in directory and its subdirectories that are new
+    or changed since the last scan. known_files maps path ->
+    (size, mtime_ns) and is updated."""
+    
+    changed = []
+    seen = set()
+    directories = [directory]
+    while directories:
+        with os.scandir(directories.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    directories.append(entry.path)
+                    continue
+                if not fnmatch.fnmatch(entry.name, pattern) or not entry.is_file():
+                    continue
+                file_info = entry.stat()
+                state = (file_info.st_size, file_info.st_mtime_ns)
+                seen.add(entry.path)
+                if known_files.get(entry.path) != state:
+                    known_files[entry.path] = state
+                    changed.append(entry.path)
+    
+    for path in set(known_files) - seen:  # Deleted or rotated away
+        del known_files[path]
+    
+    return sorted(changed)
+
+def watch_log_directory(directory, checkpoint_dir, pattern='*.txt', min_interval=0.5,
+                        max_interval=2.0, stop_event=None, on_results=None):
+    """Analyze new log data in directory until stop_event is set.
+    
+    Every changed file goes through analyze_security_log_incremental(),
+    so each pass only reads what was appended. on_results is called with
+    the list from process_file_batch after every pass with changes.
+    New lines are picked up at most max_interval seconds after they
+    are written, however long the directory was quiet before.
+    """
+    
+    checkpoint_dir = Path(checkpoint_dir)
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    stop_event = stop_event or threading.Event()
+    known_files = {}
+    interval = min_interval
+    
+    def analyze_new_lines(filename):
+        # Named after the path inside directory ('web/access.txt' ->
+        # 'web%2Faccess.txt'), so files with the same name in different
+        # subdirectories keep their own checkpoints
+        relative_path = os.path.relpath(filename, directory)
+        checkpoint_file = checkpoint_dir / (quote(relative_path, safe='') + '.checkpoint')
+        return analyze_security_log_incremental(filename, checkpoint_file)
+    
+    while not stop_event.is_set():
+        changed = scan_log_directory(directory, known_files, pattern)
+        if changed:
+            results = process_file_batch(changed, process_function=analyze_new_lines)
+            if on_results:
+                on_results(results)
+            interval = min_interval
+        else:
+            # Nothing new: wait twice as long next time, up to max_interval
+            interval = min(interval * 2, max_interval)
+        
+        stop_event.wait(interval)  # Sleeps, but wakes up at once when stopped
+
+live_dir = logs_dir / 'live'
+shutil.rmtree(live_dir, ignore_errors=True)
+live_dir.mkdir()
+shutil.rmtree(cache_dir / 'watch_checkpoints', ignore_errors=True)
+(live_dir / 'web01.txt').write_text(log_files_path.read_text().rstrip('\n') + '\n')
+
+def write_new_log_lines():
+    """Pretend to be servers: append to web01.txt, start web02.txt and
+    a second web01.txt in a subdirectory"""
+    time.sleep(0.3)
+    with open(live_dir / 'web01.txt', 'a') as f:
+        f.write("2025-10-04 10:41:00 WARNING Failed login attempt for user eve\n")
+    time.sleep(0.3)
+    with open(live_dir / 'web02.txt', 'w') as f:
+        f.write("2025-10-04 10:41:30 CRITICAL Security breach detected - IP: 10.0.0.66\n")
+    (live_dir / 'eu').mkdir()
+    with open(live_dir / 'eu' / 'web01.txt', 'w') as f:
+        f.write("2025-10-04 10:42:00 INFO User alice logged in successfully\n")
+
+watch_totals = {}
+def remember_totals(results):
+    for result in results:
+        watch_totals[os.path.relpath(result['filename'], live_dir)] = result['total_entries']
+
+stop_watching = threading.Event()
+watcher = threading.Thread(target=watch_log_directory,
+                           args=(live_dir, cache_dir / 'watch_checkpoints'),
+                           kwargs={'min_interval': 0.1, 'max_interval': 1.0,
+                                   'stop_event': stop_watching, 'on_results': remember_totals})
+writer = threading.Thread(target=write_new_log_lines)
+print("Watching while new lines are written:")
+watcher.start()
+writer.start()
+writer.join()
+
+# Measure how much CPU the watcher uses once nothing changes any more
+time.sleep(0.3)
+cpu_before, wall_before = time.process_time(), time.perf_counter()
+time.sleep(1.2)
+idle_cpu = (time.process_time() - cpu_before) / (time.perf_counter() - wall_before)
+stop_watching.set()
+watcher.join()
+
+print(f"Entries per file after watching: {dict(sorted(watch_totals.items()))}")
+print(f"CPU used while idle: {idle_cpu:.2%} of one core")
+shutil.rmtree(live_dir)
+shutil.rmtree(cache_dir / 'watch_checkpoints')
+print()
+
+# The generated benchmark logs and the caches built from them take tens
+# of MB; the small example files above are kept for the exercises
+generated_paths = [large_log_path, attack_log_path] + host_paths
+for generated_path in generated_paths:
+    if generated_path.exists():
+        generated_path.unlink()
+shutil.rmtree(cache_dir, ignore_errors=True)
+shutil.rmtree(benchmark_dir, ignore_errors=True)
+print(f"Deleted {len(generated_paths)} generated log files, {cache_dir.name}/ and the benchmark log")
+print()
+
+# -----------------------------------------------------------------------------
+# 11. EXERCISES FOR PRACTICE
 # -----------------------------------------------------------------------------
 
-print("10. Try It Yourself!")
+print("11. Try It Yourself!")
 print("-" * 22)
 print("Practice exercises to master file operations:")
 print()
@@ -11,6 +11,7 @@ Learning objectives:
 - Handle data format errors and edge cases
 - Apply JSON/CSV processing to cybersecurity scenarios
 - Create data export and reporting systems
+- Search very large threat feeds quickly
 
 Author: Programming Instructor
 Date: 04-Oct-2025
@@ -850,10 +851,859 @@ if json_to_csv_converter('network_traffic.json', 'converted_traffic.csv'):
 print()
 
 # -----------------------------------------------------------------------------
-# 10. EXERCISES FOR PRACTICE
+# 10. WORKING WITH LARGE THREAT FEEDS
 # -----------------------------------------------------------------------------
 
-print("10. Try It Yourself!")
+print("10. Working with Large Threat Feeds")
+print("-" * 35)
+
+import random
+import time
+
+print("Real threat feeds hold millions of indicators, and every network")
+print("connection, DNS query and file hash has to be checked against")
+print("them. filter_high_confidence_indicators() loops over the whole list")
+print("for every question, which is far too slow at that size.")
+print()
+
+# The two feed layouts in this session: 'type'/'value' (section 4) and
+# 'ioc_type'/'ioc_value' (threat_intel.json from 010_json_csv.py)
+IOC_TYPE_NAMES = {'ip_address': 'ip', 'file_hash': 'hash'}
+
+def indicator_type(ioc):
+    """Return 'ip', 'domain', 'hash', ... for either feed layout"""
+    ioc_type = ioc.get('ioc_type', ioc.get('type', 'unknown'))
+    return IOC_TYPE_NAMES.get(ioc_type, ioc_type)
+
+def indicator_value(ioc):
+    """Return the indicator value, lower case (domains and hashes are not case-sensitive)"""
+    return str(ioc.get('ioc_value', ioc.get('value', ''))).strip().lower()
+
+def create_large_threat_feed(filename, count, seed=10):
+    """Write a threat feed like threat_intel.json with count random indicators"""
+    
+    rng = random.Random(seed)
+    words = ['update', 'cdn', 'login', 'secure', 'mail', 'files', 'cloud', 'pay', 'auth', 'static']
+    tlds = ['com', 'net', 'org', 'io', 'ru', 'xyz']
+    severities = ['low', 'medium', 'high']
+    
+    indicators = []
+    for number in range(1, count + 1):
+        kind = rng.choice(['ip', 'ip', 'domain', 'hash'])
+        if kind == 'ip':
+            value = f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+        elif kind == 'domain':
+            value = f"{rng.choice(words)}-{rng.randint(1, 99999)}.{rng.choice(words)}.{rng.choice(tlds)}"
+        else:
+            value = f"{rng.getrandbits(256):064x}"
+        
+        indicators.append({
+            "id": f"IOC-{number:07d}",
+            "ioc_value": value,
+            "ioc_type": kind,
+            "severity": rng.choice(severities),
+            "confidence": rng.randint(40, 100),
+            "tags": ["generated"],
+        })
+    
+    with open(filename, 'w') as f:
+        json.dump({"feed_name": "Generated Feed", "indicators": indicators}, f)
+    return indicators
+
+# Every demo below scales with the feed size; small by default so the
+# session runs in seconds
+LARGE_FEED_SIZE = 20_000  # Use 200_000 or more for feed-sized timings
+large_feed_indicators = create_large_threat_feed('large_threat_intel.json', LARGE_FEED_SIZE)
+print(f"Created large_threat_intel.json with {LARGE_FEED_SIZE:,} indicators "
+      f"({Path('large_threat_intel.json').stat().st_size / 1_000_000:.0f} MB)")
+print()
+
+# Technique 1: A dictionary per indicator type
+print("Technique 1: An indicator index with O(1) lookups")
+print()
+
+print("Looking a key up in a dictionary takes the same time whether it")
+print("holds 10 or 10 million entries. We build one dictionary per")
+print("indicator type once, then answer every lookup from it.")
+print()
+
+def build_indicator_index(indicators):
+    """Build {ioc_type: {value: [indicators with that value]}}"""
+    
+    index = {}
+    for ioc in indicators:
+        by_value = index.setdefault(indicator_type(ioc), {})
+        by_value.setdefault(indicator_value(ioc), []).append(ioc)
+    return index
+
+def load_indicator_index(filename):
+    """Build the indicator index from a threat feed file"""
+    
+    try:
+        with open(filename, 'r') as f:
+            threat_data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Error loading threat feed: {e}")
+        return None
+    
+    return build_indicator_index(threat_data.get('indicators', []))
+
+def lookup_indicator(index, value, ioc_type=None):
+    """Return the indicators matching value (all types, or just ioc_type)"""
+    
+    value = str(value).strip().lower()
+    if ioc_type is not None:
+        return index.get(ioc_type, {}).get(value, [])
+    
+    matches = []
+    for by_value in index.values():  # One dictionary lookup per type
+        matches.extend(by_value.get(value, []))
+    return matches
+
+def lookup_indicator_linear(indicators, value):
+    """The slow way: compare the value with every indicator"""
+    value = str(value).strip().lower()
+    return [ioc for ioc in indicators if indicator_value(ioc) == value]
+
+# The small feeds from this session work as well
+intel_index = load_indicator_index('threat_intel.json')
+for value in ['198.51.100.42', 'MALICIOUS-SITE.example.com', '10.0.0.1']:
+    found = [ioc['id'] for ioc in lookup_indicator(intel_index, value)]
+    print(f"  {value:28} -> {found if found else 'no match'}")
+print()
+
+# Half of the queries hit an indicator, half miss
+rng = random.Random(1)
+queries = [indicator_value(rng.choice(large_feed_indicators)) for _ in range(500)]
+queries += [f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}" for _ in range(500)]
+
+start = time.perf_counter()
+large_index = build_indicator_index(large_feed_indicators)
+build_seconds = time.perf_counter() - start
+
+start = time.perf_counter()
+index_hits = sum(1 for value in queries if lookup_indicator(large_index, value))
+index_seconds = time.perf_counter() - start
+
+start = time.perf_counter()
+linear_hits = sum(1 for value in queries[::50] if lookup_indicator_linear(large_feed_indicators, value))
+linear_seconds = (time.perf_counter() - start) * 50  # Only every 50th query, scaled up
+
+print(f"{len(queries)} lookups in {LARGE_FEED_SIZE:,} indicators:")
+print(f"  Building the index once: {build_seconds:.2f} s")
+print(f"  Index:       {index_seconds * 1000:8.2f} ms ({index_seconds / len(queries) * 1_000_000:.1f} µs per lookup)")
+print(f"  Linear scan: {linear_seconds * 1000:8.0f} ms (estimated from every 50th query)")
+print(f"  Matches: {index_hits} with the index, {linear_hits} of {len(queries[::50])} sampled with the scan")
+print()
+
+# Technique 2: Reading a feed one indicator at a time
+print("Technique 2: Streaming the indicators array")
+print()
+
+import re
+import tracemalloc
+
+print("json.load() builds the whole feed in memory before we can look at")
+print("the first indicator; a 5 GB feed needs far more than 5 GB of RAM.")
+print("json.JSONDecoder().raw_decode() can decode one value from the middle")
+print("of a string, so we read the file in chunks and decode the elements")
+print("of the 'indicators' array one by one.")
+print()
+
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+def iter_json_array(filename, array_key='indicators', chunk_size=64 * 1024):
+    """Yield the elements of the top-level array_key array of a JSON file
+    one at a time. Other top-level values are decoded and skipped."""
+    
+    decoder = json.JSONDecoder()
+    
+    with open(filename, 'r', encoding='utf-8') as f:
+        buffer = ''
+        position = 0
+        at_end = False
+        
+        def read_more():
+            """Add the next chunk to the buffer; False at the end of the file"""
+            nonlocal buffer, position, at_end
+            chunk = f.read(chunk_size)
+            if not chunk:
+                at_end = True
+                return False
+            buffer = buffer[position:] + chunk  # Drop what we already used
+            position = 0
+            return True
+        
+        def next_char():
+            """Skip whitespace and return the next character ('' at the end)"""
+            nonlocal position
+            while True:
+                position = JSON_WHITESPACE.match(buffer, position).end()
+                if position < len(buffer) or not read_more():
+                    return buffer[position:position + 1]
+        
+        def decode_value():
+            """Decode one complete JSON value starting at position"""
+            nonlocal position
+            next_char()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                    # A number cut off by the end of the chunk ('13' of
+                    # '13.5') looks complete, so check what comes after it
+                    if at_end or (end < len(buffer) and buffer[end] not in '0123456789.eE+-'):
+                        position = end
+                        return value
+                except json.JSONDecodeError:
+                    if at_end:
+                        raise
+                read_more()  # Incomplete: decode again with more data
+        
+        def expect(characters):
+            nonlocal position
+            char = next_char()
+            if not char or char not in characters:
+                raise json.JSONDecodeError(f"Expected one of {characters!r}", buffer, position)
+            position += 1
+            return char
+        
+        expect('{')
+        if next_char() == '}':
+            return
+        
+        while True:
+            key = decode_value()
+            expect(':')
+            
+            if key == array_key:
+                expect('[')
+                if next_char() == ']':
+                    position += 1
+                else:
+                    while True:
+                        yield decode_value()
+                        if expect(',]') == ']':
+                            break
+            else:
+                decode_value()  # Not the array we want (feed_name, ...)
+            
+            if expect(',}') == '}':
+                return
+
+def filter_high_confidence_streaming(filename, min_confidence=80, target_severity='high'):
+    """Like filter_high_confidence_indicators, but yields matches while reading"""
+    for ioc in iter_json_array(filename, 'indicators'):
+        if ioc.get('confidence', 0) > min_confidence and \
+                ioc.get('severity', '').lower() == target_severity.lower():
+            yield ioc
+
+def filter_with_json_load(filename, min_confidence=80, target_severity='high'):
+    """The json.load() version, without the printing"""
+    with open(filename, 'r') as f:
+        threat_data = json.load(f)
+    return [ioc for ioc in threat_data.get('indicators', [])
+            if ioc.get('confidence', 0) > min_confidence
+            and ioc.get('severity', '').lower() == target_severity.lower()]
+
+print("Streaming the small feed:")
+for ioc in filter_high_confidence_streaming('threat_intel.json'):
+    print(f"  ✓ {ioc['id']}: {indicator_type(ioc)} - {indicator_value(ioc)}")
+print()
+
+def measure(function, *args):
+    """Return (result, seconds, peak memory in bytes)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak
+
+def first_match(filename):
+    return next(filter_high_confidence_streaming(filename))
+
+def count_matches(filename):
+    return sum(1 for _ in filter_high_confidence_streaming(filename))
+
+loaded, load_seconds, load_peak = measure(filter_with_json_load, 'large_threat_intel.json')
+streamed, stream_seconds, stream_peak = measure(count_matches, 'large_threat_intel.json')
+_, first_seconds, _ = measure(first_match, 'large_threat_intel.json')
+
+print(f"Filtering large_threat_intel.json ({LARGE_FEED_SIZE:,} indicators):")
+print(f"  json.load(): {load_seconds:.2f} s, peak memory {load_peak / 1_000_000:6.1f} MB")
+print(f"  streaming:   {stream_seconds:.2f} s, peak memory {stream_peak / 1_000_000:6.1f} MB, "
+      f"first match after {first_seconds * 1000:.1f} ms")
+print(f"  Same number of matches: {len(loaded) == streamed}")
+print("  (Times are measured with tracemalloc running, which slows both.)")
+print()
+
+# Technique 3: Matching IP addresses against netblocks
+print("Technique 3: A prefix trie for CIDR indicators")
+print()
+
+import gc
+import ipaddress
+import socket
+
+print("Feeds often list whole networks ('203.0.113.0/24') instead of single")
+print("IPs, and an address can be inside several of them. The most")
+print("specific (longest) match is the useful one. A binary trie follows")
+print("the bits of the address from the left, so a lookup takes at most")
+print("32 steps for IPv4 and 128 for IPv6, however many networks we have.")
+print()
+
+# A trie node is a list: [network, prefix length, indicators, child for bit 0, child for bit 1]
+# Nodes with only one child are skipped (a "Patricia" trie), so a path
+# only has a node where two prefixes differ or where a prefix ends.
+NETWORK, LENGTH, VALUES, ZERO, ONE = range(5)
+
+def new_prefix_trie():
+    """Create an empty trie for IPv4 and IPv6 prefixes"""
+    return {4: [0, 0, None, None, None], 6: [0, 0, None, None, None], 'prefixes': 0}
+
+def parse_cidr(text):
+    """Return (version, network as int, prefix length) for '10.0.0.0/8' or '10.1.2.3'"""
+    
+    address, _, length = text.strip().partition('/')
+    try:
+        # socket is much faster than ipaddress for the common cases
+        if ':' in address:
+            version, bits, number = 6, 128, int.from_bytes(socket.inet_pton(socket.AF_INET6, address), 'big')
+        else:
+            version, bits, number = 4, 32, int.from_bytes(socket.inet_pton(socket.AF_INET, address), 'big')
+        length = int(length) if length else bits
+    except (OSError, ValueError):
+        raise ValueError(f"Not an IP address or network: {text!r}")
+    if not 0 <= length <= bits:
+        raise ValueError(f"Invalid prefix length: {text!r}")
+    
+    host_bits = bits - length
+    return version, number >> host_bits << host_bits, length  # Clear the host bits
+
+def prefix_trie_insert(trie, version, network, length, value, path=None):
+    """Add value under the prefix network/length.
+    
+    path is used by the bulk build: a list of nodes from the root down,
+    the last of which contains the new prefix. The insert starts there
+    instead of at the root and appends every node it goes into.
+    """
+    
+    bits = 32 if version == 4 else 128
+    node = path[-1] if path else trie[version]
+    
+    while True:
+        if node[LENGTH] == length:
+            if node[VALUES] is None:
+                node[VALUES] = []
+                trie['prefixes'] += 1
+            node[VALUES].append(value)
+            return
+        
+        # The next bit after this node's prefix chooses the child
+        side = ONE if network >> (bits - node[LENGTH] - 1) & 1 else ZERO
+        child = node[side]
+        if child is None:
+            node[side] = [network, length, [value], None, None]
+            trie['prefixes'] += 1
+            if path is not None:
+                path.append(node[side])
+            return
+        
+        # How many leading bits do the child's prefix and ours share?
+        common = min(bits - (child[NETWORK] ^ network).bit_length(), child[LENGTH], length)
+        if common == child[LENGTH]:
+            node = child  # The child's prefix is part of ours: go deeper
+            if path is not None:
+                path.append(node)
+            continue
+        
+        # Our prefix ends or differs inside the child's: add a node there
+        host_bits = bits - common
+        middle = [network >> host_bits << host_bits, common, None, None, None]
+        middle[ONE if child[NETWORK] >> (host_bits - 1) & 1 else ZERO] = child
+        node[side] = middle
+        node = middle  # The loop adds our value to it or below it
+        if path is not None:
+            path.append(node)
+
+def prefix_trie_lookup(trie, address):
+    """Return (network text, indicators) of the longest prefix that
+    contains the IP address, or None"""
+    
+    version, number, _ = parse_cidr(address)
+    bits = 32 if version == 4 else 128
+    node = trie[version]
+    best = None
+    
+    while node is not None:
+        length = node[LENGTH]
+        if length and (number ^ node[NETWORK]) >> (bits - length):
+            break  # The address is outside this node's prefix
+        if node[VALUES] is not None:
+            best = node
+        if length == bits:
+            break
+        node = node[ONE] if number >> (bits - length - 1) & 1 else node[ZERO]
+    
+    if best is None:
+        return None
+    network = ipaddress.ip_address(best[NETWORK]) if version == 4 else ipaddress.IPv6Address(best[NETWORK])
+    return f"{network}/{best[LENGTH]}", best[VALUES]
+
+def build_prefix_trie(pairs):
+    """Bulk-build a trie from (cidr text, value) pairs.
+    
+    Sorted by network and then length, each new prefix lands to the
+    right of everything inserted so far. We keep the path from the root
+    to the last insert and start each insert from the deepest node on it
+    that still contains the new prefix, instead of from the root.
+    """
+    
+    values = []
+    parsed = []
+    for text, value in pairs:
+        try:
+            parsed.append(parse_cidr(text) + (len(values),))
+            values.append(value)
+        except ValueError as e:
+            print(f"Skipping indicator: {e}")
+    parsed.sort()  # The position breaks ties, so values are never compared
+    
+    trie = new_prefix_trie()
+    path = []
+    current_version = None
+    
+    # Every node is a new list; the garbage collector would otherwise keep
+    # rescanning the growing trie while we build it
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for version, network, length, position in parsed:
+            if version != current_version:
+                current_version = version
+                bits = 32 if version == 4 else 128
+                path = [trie[version]]
+            
+            # Leave the nodes whose prefix does not contain this one
+            while len(path) > 1:
+                top = path[-1]
+                if top[LENGTH] <= length and not (network ^ top[NETWORK]) >> (bits - top[LENGTH]):
+                    break
+                path.pop()
+            
+            prefix_trie_insert(trie, version, network, length, values[position], path)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return trie
+
+def build_ip_indicator_trie(indicators):
+    """Prefix trie of every 'ip' indicator (single IPs count as /32 or /128)"""
+    return build_prefix_trie((indicator_value(ioc), ioc) for ioc in indicators
+                             if indicator_type(ioc) == 'ip')
+
+def random_cidr(rng):
+    """A random IPv4 network (or sometimes IPv6) for the demo"""
+    if rng.random() < 0.1:
+        length = rng.choice([32, 48, 64, 128])
+        return f"{ipaddress.IPv6Address(rng.getrandbits(128))}/{length}"
+    length = rng.choice([16, 20, 24, 24, 28, 32, 32, 32, 32, 32])
+    return f"{ipaddress.IPv4Address(rng.getrandbits(32))}/{length}"
+
+netblock_indicators = [
+    {"id": "NET-001", "ioc_type": "ip", "ioc_value": "203.0.113.0/24", "severity": "medium"},
+    {"id": "NET-002", "ioc_type": "ip", "ioc_value": "203.0.0.0/16", "severity": "low"},
+    {"id": "NET-003", "ioc_type": "ip", "ioc_value": "2001:db8::/32", "severity": "high"},
+]
+with open('threat_intel.json', 'r') as f:
+    small_feed = json.load(f).get('indicators', [])
+small_trie = build_ip_indicator_trie(small_feed + netblock_indicators)
+
+for address in ['203.0.113.77', '203.0.113.5', '203.0.7.7', '2001:db8::1', '8.8.8.8']:
+    match = prefix_trie_lookup(small_trie, address)
+    if match:
+        network, iocs = match
+        print(f"  {address:14} -> {network:18} {[ioc['id'] for ioc in iocs]}")
+    else:
+        print(f"  {address:14} -> no match")
+print()
+
+rng = random.Random(23)
+netblocks = [(random_cidr(rng), number) for number in range(LARGE_FEED_SIZE * 2)]
+start = time.perf_counter()
+large_trie = build_prefix_trie(netblocks)
+trie_build_seconds = time.perf_counter() - start
+
+addresses = [str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(LARGE_FEED_SIZE // 2)]
+start = time.perf_counter()
+trie_matches = sum(1 for address in addresses if prefix_trie_lookup(large_trie, address))
+trie_lookup_seconds = time.perf_counter() - start
+
+print(f"Bulk build of {len(netblocks):,} networks: {trie_build_seconds:.2f} s "
+      f"({large_trie['prefixes']:,} different prefixes)")
+print(f"{len(addresses):,} lookups: {trie_lookup_seconds:.2f} s "
+      f"({trie_lookup_seconds / len(addresses) * 1_000_000:.1f} µs each, {trie_matches:,} matched)")
+
+# Check against ipaddress on a small sample: longest network containing the address
+sample_networks = [ipaddress.ip_network(text, strict=False) for text, _ in netblocks[:2000]]
+sample_trie = build_prefix_trie(netblocks[:2000])
+agree = True
+for address in addresses[:300]:
+    ip = ipaddress.ip_address(address)
+    containing = [network for network in sample_networks if network.version == 4 and ip in network]
+    expected = str(max(containing, key=lambda network: network.prefixlen)) if containing else None
+    match = prefix_trie_lookup(sample_trie, address)
+    agree = agree and (match[0] if match else None) == expected
+print(f"Same answers as checking every network with ipaddress: {agree}")
+print()
+
+# Technique 4: Matching DNS names against domain indicators
+print("Technique 4: A suffix trie for domain indicators")
+print()
+
+print("A domain indicator such as malicious-site.example.com should also")
+print("match cdn.malicious-site.example.com. Checking name.endswith() for")
+print("every domain indicator is far too slow. Instead we store the")
+print("indicators label by label from the right (com -> example ->")
+print("malicious-site), so a name is checked by following its own labels:")
+print("a handful of dictionary lookups, however many indicators we have.")
+print()
+
+# A trie node is a dictionary {label: child node}; the indicators of the
+# domain that ends at a node are stored under the key None (never a label)
+DOMAIN_MATCHES = None
+
+def normalize_domain(name):
+    """Lower case, without a trailing dot or a leading '*.' wildcard"""
+    name = str(name).strip().lower().rstrip('.')
+    return name[2:] if name.startswith('*.') else name
+
+def build_domain_trie(pairs):
+    """Build a suffix trie from (domain, value) pairs"""
+    
+    trie = {}
+    for domain, value in pairs:
+        node = trie
+        for label in reversed(normalize_domain(domain).split('.')):
+            child = node.get(label)
+            if child is None:
+                child = node[label] = {}
+            node = child
+        
+        if DOMAIN_MATCHES in node:
+            node[DOMAIN_MATCHES].append(value)
+        else:
+            node[DOMAIN_MATCHES] = [value]
+    return trie
+
+def build_domain_indicator_trie(indicators):
+    """Suffix trie of every 'domain' indicator"""
+    return build_domain_trie((indicator_value(ioc), ioc) for ioc in indicators
+                             if indicator_type(ioc) == 'domain')
+
+def domain_trie_lookup(trie, name):
+    """Return [(indicator domain, values)] for name and each of its
+    parent domains that is an indicator, the most specific first"""
+    
+    labels = normalize_domain(name).split('.')
+    node = trie
+    matches = []
+    for position in range(len(labels) - 1, -1, -1):
+        node = node.get(labels[position])
+        if node is None:
+            break
+        if DOMAIN_MATCHES in node:
+            matches.append(('.'.join(labels[position:]), node[DOMAIN_MATCHES]))
+    
+    matches.reverse()
+    return matches
+
+def lookup_domains(trie, names):
+    """Check many names (a DNS log, for example); yield (name, matches)
+    for the names that match an indicator.
+    
+    DNS traffic repeats the same names all the time, so each answer is
+    cached: most names then cost a single dictionary lookup.
+    """
+    
+    cache = {}
+    for name in names:
+        matches = cache.get(name)
+        if matches is None:
+            if len(cache) >= 1_000_000:
+                cache.clear()  # Keep the memory bounded
+            matches = cache[name] = domain_trie_lookup(trie, name)
+        if matches:
+            yield name, matches
+
+def lookup_domain_linear(domains, name):
+    """The slow way: compare the name with every indicator domain"""
+    name = normalize_domain(name)
+    return [domain for domain in domains if name == domain or name.endswith('.' + domain)]
+
+domain_indicators = [
+    {"id": "DOM-001", "ioc_type": "domain", "ioc_value": "example.com", "severity": "low"},
+    {"id": "DOM-002", "ioc_type": "domain", "ioc_value": "*.tracker.example.net", "severity": "medium"},
+]
+small_domain_trie = build_domain_indicator_trie(small_feed + domain_indicators)
+
+for name in ['malicious-site.example.com', 'CDN.malicious-site.example.com.',
+             'www.example.com', 'a.b.tracker.example.net', 'example.net']:
+    matches = domain_trie_lookup(small_domain_trie, name)
+    found = [f"{domain} {[ioc['id'] for ioc in iocs]}" for domain, iocs in matches]
+    print(f"  {name:32} -> {', '.join(found) if found else 'no match'}")
+print()
+
+# DNS queries: some for feed domains or their subdomains, most for other names
+rng = random.Random(24)
+feed_domains = [indicator_value(ioc) for ioc in large_feed_indicators if indicator_type(ioc) == 'domain']
+popular_names = [f"www.site-{number}.{rng.choice(['com', 'net', 'org'])}" for number in range(20_000)]
+dns_queries = []
+for _ in range(LARGE_FEED_SIZE * 5):
+    if rng.random() < 0.01:
+        dns_queries.append(f"{rng.choice(['', 'cdn.', 'a.b.'])}{rng.choice(feed_domains)}")
+    else:
+        dns_queries.append(popular_names[min(int(rng.paretovariate(1.0)) - 1, len(popular_names) - 1)])
+
+start = time.perf_counter()
+large_domain_trie = build_domain_indicator_trie(large_feed_indicators)
+domain_build_seconds = time.perf_counter() - start
+
+start = time.perf_counter()
+domain_hits = sum(1 for _ in lookup_domains(large_domain_trie, dns_queries))
+domain_lookup_seconds = time.perf_counter() - start
+
+start = time.perf_counter()
+uncached_queries = dns_queries[:len(dns_queries) // 10]
+uncached_hits = sum(1 for name in uncached_queries if domain_trie_lookup(large_domain_trie, name))
+uncached_seconds = time.perf_counter() - start
+
+sample_queries = dns_queries[::1000]
+start = time.perf_counter()
+for name in sample_queries:
+    lookup_domain_linear(feed_domains, name)
+linear_domain_seconds = (time.perf_counter() - start) / len(sample_queries) * len(dns_queries)  # Scaled up
+
+print(f"{len(dns_queries):,} DNS queries against {len(feed_domains):,} domain indicators:")
+print(f"  Building the trie once: {domain_build_seconds:.2f} s")
+print(f"  Trie with a cache: {domain_lookup_seconds:7.2f} s "
+      f"({len(dns_queries) / domain_lookup_seconds * 60 / 1_000_000:.0f} million queries per minute, {domain_hits:,} matched)")
+print(f"  Trie, no cache:    {uncached_seconds * 10:7.2f} s "
+      f"({len(uncached_queries) / uncached_seconds * 60 / 1_000_000:.0f} million per minute, "
+      f"from the first {len(uncached_queries):,}: {uncached_hits:,} matched)")
+print(f"  endswith() scan:   {linear_domain_seconds:7.1f} s (estimated from every 1,000th query)")
+
+# Both ways must find the same indicator domains, for hits and misses
+check_names = [name for name in uncached_queries if domain_trie_lookup(large_domain_trie, name)] + sample_queries
+agree = all(set(lookup_domain_linear(feed_domains, name)) ==
+            {domain for domain, _ in domain_trie_lookup(large_domain_trie, name)}
+            for name in check_names)
+print(f"  Same matches as the endswith() scan: {agree}")
+print()
+
+# Technique 5: A Bloom filter in front of the hash indicators
+print("Technique 5: A Bloom filter for file hash lookups")
+print()
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+
+print("Almost every file hash we check is NOT in the feed, but to say so")
+print("the exact index has to be loaded first - seconds and hundreds of MB")
+print("for a big feed. A Bloom filter is a small array of bits that")
+print("answers 'definitely not in the feed' or 'maybe in the feed'. It is")
+print("written to disk once and opened with mmap in milliseconds; only the")
+print("'maybe' answers need the exact index, which we load on the first one.")
+print()
+
+# File layout: magic, number of bits, number of hash functions, then the bits
+BLOOM_MAGIC = b'BLM1'
+BLOOM_HEADER = struct.Struct('<4sQI')
+
+def new_bloom_filter(expected_items, false_positive_rate=0.001):
+    """Create an empty filter sized for expected_items values"""
+    
+    if not 0 < false_positive_rate < 1:
+        raise ValueError(f"false_positive_rate must be between 0 and 1, got {false_positive_rate}")
+    expected_items = max(expected_items, 1)
+    size = math.ceil(-expected_items * math.log(false_positive_rate) / math.log(2) ** 2)
+    hashes = max(1, round(size / expected_items * math.log(2)))
+    return {'bits': bytearray((size + 7) // 8), 'size': size, 'hashes': hashes}
+
+def bloom_hash_pair(value):
+    """Two 64-bit hashes of a value; bit i is h1 + i * h2 (double hashing)"""
+    digest = hashlib.blake2b(str(value).strip().lower().encode(), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+def bloom_add(bloom, value):
+    """Set the bits of value"""
+    h1, h2 = bloom_hash_pair(value)
+    bits, size = bloom['bits'], bloom['size']
+    for i in range(bloom['hashes']):
+        position = (h1 + i * h2) % size
+        bits[position >> 3] |= 1 << (position & 7)
+
+def bloom_might_contain(bloom, value):
+    """False: value was never added. True: it probably was"""
+    h1, h2 = bloom_hash_pair(value)
+    bits, size = bloom['bits'], bloom['size']
+    for i in range(bloom['hashes']):
+        position = (h1 + i * h2) % size
+        if not bits[position >> 3] & (1 << (position & 7)):
+            return False  # Most misses stop after one or two bits
+    return True
+
+def build_hash_bloom_filter(indicators, false_positive_rate=0.001):
+    """Bloom filter of the values of every 'hash' indicator"""
+    
+    hashes = {indicator_value(ioc) for ioc in indicators if indicator_type(ioc) == 'hash'}
+    bloom = new_bloom_filter(len(hashes), false_positive_rate)
+    for value in hashes:
+        bloom_add(bloom, value)
+    return bloom
+
+def save_bloom_filter(bloom, filename):
+    """Write the filter to a file"""
+    # A reader that maps the file mid-write would see a truncated filter,
+    # so write a temporary file and rename it over the old one
+    temp_file = Path(str(filename) + '.tmp')
+    with open(temp_file, 'wb') as f:
+        f.write(BLOOM_HEADER.pack(BLOOM_MAGIC, bloom['size'], bloom['hashes']))
+        f.write(bloom['bits'])
+    os.replace(temp_file, filename)
+
+def load_bloom_filter(filename):
+    """Open a saved filter with mmap: the bits are read from the page
+    cache when a lookup needs them, not all at startup"""
+    
+    try:
+        with open(filename, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError) as e:  # ValueError: empty file
+        print(f"Error loading Bloom filter: {e}")
+        return None
+    
+    magic, size, hashes = b'', 0, 0
+    if len(mapped) >= BLOOM_HEADER.size:
+        magic, size, hashes = BLOOM_HEADER.unpack_from(mapped)
+    if magic != BLOOM_MAGIC or len(mapped) < BLOOM_HEADER.size + (size + 7) // 8:
+        print(f"Error loading Bloom filter: {filename} is not a Bloom filter file")
+        mapped.close()
+        return None
+    
+    bits = memoryview(mapped)[BLOOM_HEADER.size:]
+    return {'bits': bits, 'size': size, 'hashes': hashes, 'mmap': mapped}
+
+def close_bloom_filter(bloom):
+    """Release the mmap of a filter from load_bloom_filter()"""
+    bloom['bits'].release()
+    bloom['mmap'].close()
+
+def scan_hashes_with_prefilter(file_hashes, bloom, feed_filename):
+    """Check file hashes against the hash indicators of a feed.
+    
+    The exact index is only built (from a stream of the feed) when the
+    filter first answers 'maybe'. Returns ({hash: indicators}, stats).
+    """
+    
+    index = None
+    matches = {}
+    stats = {'checked': 0, 'prefilter_hits': 0, 'false_positives': 0}
+    
+    for value in file_hashes:
+        stats['checked'] += 1
+        if not bloom_might_contain(bloom, value):
+            continue
+        
+        stats['prefilter_hits'] += 1
+        if index is None:
+            index = build_indicator_index(ioc for ioc in iter_json_array(feed_filename)
+                                          if indicator_type(ioc) == 'hash')
+        found = lookup_indicator(index, value, 'hash')
+        if found:
+            matches[value] = found
+        else:
+            stats['false_positives'] += 1
+    
+    return matches, stats
+
+feed_hashes = [indicator_value(ioc) for ioc in large_feed_indicators if indicator_type(ioc) == 'hash']
+start = time.perf_counter()
+hash_bloom = build_hash_bloom_filter(large_feed_indicators, false_positive_rate=0.001)
+bloom_build_seconds = time.perf_counter() - start
+save_bloom_filter(hash_bloom, 'hash_iocs.bloom')
+
+start = time.perf_counter()
+loaded_bloom = load_bloom_filter('hash_iocs.bloom')
+bloom_load_seconds = time.perf_counter() - start
+
+start = time.perf_counter()
+feed_index = load_indicator_index('large_threat_intel.json')
+index_load_seconds = time.perf_counter() - start
+
+print(f"Filter for {len(feed_hashes):,} hash indicators (target false positive rate 0.1%):")
+print(f"  {hash_bloom['size']:,} bits, {hash_bloom['hashes']} hash functions, "
+      f"{Path('hash_iocs.bloom').stat().st_size / 1024:.0f} KB on disk, built in {bloom_build_seconds:.2f} s")
+print(f"  Opening it with mmap: {bloom_load_seconds * 1000:.2f} ms")
+print(f"  Loading the exact index from JSON: {index_load_seconds:.2f} s")
+print()
+
+# Hashes of files on a host: all unknown except a few from the feed
+rng = random.Random(25)
+file_hashes = [f"{rng.getrandbits(256):064x}" for _ in range(LARGE_FEED_SIZE)] + rng.sample(feed_hashes, 20)
+rng.shuffle(file_hashes)
+
+start = time.perf_counter()
+prefilter_matches, prefilter_stats = scan_hashes_with_prefilter(file_hashes, loaded_bloom, 'large_threat_intel.json')
+prefilter_seconds = time.perf_counter() - start
+
+start = time.perf_counter()
+sum(1 for value in file_hashes if bloom_might_contain(loaded_bloom, value))
+bloom_check_seconds = time.perf_counter() - start
+
+start = time.perf_counter()
+exact_matches = {}
+for value in file_hashes:
+    found = lookup_indicator(feed_index, value, 'hash')
+    if found:
+        exact_matches[value] = found
+exact_seconds = time.perf_counter() - start
+
+unknown_hashes = prefilter_stats['checked'] - len(prefilter_matches)
+print(f"Checking {len(file_hashes):,} file hashes:")
+print(f"  With the filter: {prefilter_seconds:.2f} s in total, including building the exact index on the first 'maybe'")
+print(f"    {prefilter_stats['prefilter_hits']} 'maybe' answers, {len(prefilter_matches)} real matches, "
+      f"{prefilter_stats['false_positives']} false positives "
+      f"({prefilter_stats['false_positives'] / unknown_hashes:.3%} of the unknown hashes)")
+print(f"  Filter checks alone: {bloom_check_seconds / len(file_hashes) * 1_000_000:.1f} µs per hash")
+print(f"  Index lookups alone: {exact_seconds / len(file_hashes) * 1_000_000:.1f} µs per hash "
+      f"(once the index has been loaded)")
+print(f"  Same matches: {prefilter_matches.keys() == exact_matches.keys()}")
+close_bloom_filter(loaded_bloom)
+print()
+
+print("In Python one filter check costs more than one dictionary lookup")
+print("(hashing the value is most of it), so the filter pays off at")
+print("startup and in memory: a scanner that starts often, or runs where")
+print("the whole index does not fit, answers almost every hash from a")
+print("few KB of bits and only reads the feed for the rare 'maybe'.")
+print()
+
+# The generated feed and filter are only needed by the demos above
+for generated_file in ['large_threat_intel.json', 'hash_iocs.bloom']:
+    Path(generated_file).unlink()
+print("Deleted large_threat_intel.json and hash_iocs.bloom")
+print()
+
+# -----------------------------------------------------------------------------
+# 11. EXERCISES FOR PRACTICE
+# -----------------------------------------------------------------------------
+
+print("11. Try It Yourself!")
 print("-" * 22)
 print("Practice exercises to master JSON and CSV processing:")
 print()
@@ -613,6 +613,117 @@ print()
 # print(f"Total log entries: {stats['total_entries']}")
 # print(f"Log level distribution: {stats['level_counts']}")
 
+# Going further: "most common error messages" in very large logs
+print("Going further: grouping messages into templates")
+print()
+print("Counting messages with a dictionary keyed by the full text fails")
+print("when messages contain IPs, user names or ids: every message is")
+print("different. Instead we group them into templates, e.g.")
+print("  'Connection from 10.0.0.5 refused' -> 'Connection from <*> refused'")
+print()
+
+import os
+import random
+from collections import OrderedDict
+
+def new_template_miner(max_templates=1000, similarity=0.5):
+    """Create a streaming message-template miner (a simplified Drain).
+    
+    At most max_templates templates are kept; when the table is full,
+    the least recently used template is dropped, so memory stays flat
+    no matter how many lines are processed.
+    """
+    return {
+        'max_templates': max_templates,
+        'similarity': similarity,
+        'templates': OrderedDict(),  # id -> {'tokens': [...], 'count': n}
+        'groups': {},                # (token count, first token) -> [ids]
+        'next_id': 0,
+        'dropped_lines': 0           # Lines counted in dropped templates
+    }
+
+def add_message(miner, message):
+    """Add one log message to the miner"""
+    
+    # Tokens with digits (IPs, ids, ports, times) are always variables
+    tokens = ['<*>' if any(char.isdigit() for char in token) else token
+              for token in message.split()]
+    group_key = (len(tokens), tokens[0] if tokens else '')
+    group = miner['groups'].get(group_key, [])
+    templates = miner['templates']
+    
+    # Find the most similar template of the same length and first word
+    best_id, best_score = None, -1.0
+    for template_id in group:
+        template = templates[template_id]['tokens']
+        same = sum(1 for a, b in zip(template, tokens) if a == b)
+        score = same / len(tokens) if tokens else 1.0
+        if score > best_score:
+            best_id, best_score = template_id, score
+    
+    if best_id is not None and best_score >= miner['similarity']:
+        template = templates[best_id]
+        # Positions where the message differs become variables
+        template['tokens'] = [a if a == b else '<*>' for a, b in zip(template['tokens'], tokens)]
+        template['count'] += 1
+        templates.move_to_end(best_id)
+        return
+    
+    if len(templates) >= miner['max_templates']:
+        old_id, old_template = templates.popitem(last=False)
+        old_tokens = old_template['tokens']
+        old_key = (len(old_tokens), old_tokens[0] if old_tokens else '')
+        miner['groups'][old_key].remove(old_id)
+        if not miner['groups'][old_key]:
+            del miner['groups'][old_key]  # Empty groups would pile up
+        miner['dropped_lines'] += old_template['count']
+    
+    templates[miner['next_id']] = {'tokens': tokens, 'count': 1}
+    miner['groups'].setdefault(group_key, []).append(miner['next_id'])
+    miner['next_id'] += 1
+
+def most_common_templates(miner, n=10):
+    """Return the n templates seen most often as (template, count)"""
+    ranked = sorted(miner['templates'].values(), key=lambda t: t['count'], reverse=True)
+    return [(' '.join(t['tokens']), t['count']) for t in ranked[:n]]
+
+def mine_error_templates(filename, levels=('ERROR', 'CRITICAL'), max_templates=1000):
+    """Stream a log file and group the messages of the given levels"""
+    
+    miner = new_template_miner(max_templates)
+    with open(filename, 'r') as f:
+        for line in f:
+            parts = line.split(maxsplit=3)  # date, time, level, message
+            if len(parts) == 4 and parts[2] in levels:
+                add_message(miner, parts[3])
+    return miner
+
+miner = mine_error_templates('security_log.txt')
+print("Error templates in security_log.txt:")
+for template, count in most_common_templates(miner):
+    print(f"  {count:3}x {template}")
+print()
+
+print("Same idea on 100,000 generated error lines:")
+rng = random.Random(12)
+with open('big_error_log.txt', 'w') as f:
+    for i in range(100_000):
+        choice = rng.random()
+        if choice < 0.5:
+            message = f"Connection from 10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)} refused"
+        elif choice < 0.8:
+            message = f"Failed login for user {rng.choice(['alice', 'bob', 'eve', 'mallory'])} from 192.168.1.{rng.randint(1, 254)}"
+        else:
+            message = f"Job {rng.randint(1000, 9999)} timed out after {rng.randint(1, 60)} seconds"
+        f.write(f"2025-11-04 10:00:00 ERROR {message}\n")
+
+big_miner = mine_error_templates('big_error_log.txt', max_templates=100)
+for template, count in most_common_templates(big_miner):
+    print(f"  {count:6}x {template}")
+print(f"  Templates kept in memory: {len(big_miner['templates'])}")
+os.remove('big_error_log.txt')  # 6.5 MB, only needed for this demo
+print()
+
 print("Exercise 4: Student Grade Manager")
 print("Description: Complete student management system")
 print("Requirements:")